@@ -0,0 +1,93 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """Ограниченный LRU-кэш токенов с временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            token, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        with self._lock:
+            self._data[key] = (token, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for key in [key for key, (token, _) in self._data.items()
+                        if token.user_id == user_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def shared_cache_key(key):
+    return f'auth:token:{key}'
+
+
+def forget_token(key):
+    token_cache.delete(key)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.delete(shared_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Токен-аутентификация без запроса к authtoken_token на каждый вызов.
+
+    С общим кэшем (Redis) по умолчанию включён TOKEN_CACHE_SHARED, и
+    сброс при выходе, смене пароля и блокировке виден всем воркерам
+    сразу. Без общего кэша токены хранятся в LRU процесса, и в других
+    процессах сброс виден только через TOKEN_CACHE_TTL. Каждый запрос
+    получает свою копию пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        token = self.get_cached(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            self.set_cached(key, token)
+        return copy.copy(token.user), token
+
+    def get_cached(self, key):
+        if settings.TOKEN_CACHE_SHARED:
+            return cache.get(shared_cache_key(key))
+        return token_cache.get(key)
+
+    def set_cached(self, key, token):
+        if settings.TOKEN_CACHE_SHARED:
+            cache.set(shared_cache_key(key), token, settings.TOKEN_CACHE_TTL)
+        else:
+            token_cache.set(key, token)
@@ -0,0 +1,100 @@
+import base64
+import binascii
+import warnings
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from drf_extra_fields.fields import Base64FieldMixin, Base64ImageField
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+class TemporaryImageUpload(TemporaryUploadedFile):
+    """Временный файл, который хранилище может переместить без ошибок."""
+
+    def __del__(self):
+        self.close()
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """Base64-картинка с потоковым декодированием во временный файл.
+
+    Размер в байтах проверяется до декодирования, размеры и число
+    пикселей читаются из заголовка до распаковки изображения.
+    """
+    default_error_messages = {
+        'too_large': 'Размер изображения не должен превышать {max_bytes} байт.',
+        'too_many_pixels': (
+            'Изображение {width}x{height} больше допустимого '
+            '({max_side} px по стороне, {max_pixels} пикселей).'
+        ),
+        'decompression_bomb': 'Изображение слишком велико для обработки.',
+    }
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        content_type = None
+        offset = base64_data.find(';base64,', 0, 256)
+        if offset == -1:
+            offset = 0
+        else:
+            if self.trust_provided_content_type:
+                content_type = base64_data[:offset].replace('data:', '')
+            offset += len(';base64,')
+
+        max_bytes = settings.MAX_UPLOAD_IMAGE_BYTES
+        if (len(base64_data) - offset) // 4 * 3 > max_bytes + 2:
+            self.fail('too_large', max_bytes=max_bytes)
+
+        upload = TemporaryImageUpload(
+            self.get_file_name(None), content_type, 0, None)
+        try:
+            self.decode_to_file(base64_data, offset, upload)
+            extension = self.check_image_header(upload)
+        except Exception:
+            upload.close()
+            raise
+        upload.name = f'{upload.name}.{extension}'
+        return super(Base64FieldMixin, self).to_internal_value(upload)
+
+    def decode_to_file(self, base64_data, offset, upload):
+        """Декодирование кусками, без копии всей строки в памяти."""
+        step = DECODE_CHUNK_SIZE * 4
+        try:
+            for start in range(offset, len(base64_data), step):
+                upload.write(base64.b64decode(
+                    base64_data[start:start + step], validate=True))
+        except (TypeError, binascii.Error, ValueError):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        upload.size = upload.tell()
+        upload.seek(0)
+
+    def check_image_header(self, upload):
+        """Проверка формата и размеров без распаковки пикселей."""
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', Image.DecompressionBombWarning)
+                with Image.open(upload.temporary_file_path()) as image:
+                    width, height = image.size
+                    image_format = (image.format or '').lower()
+        except (Image.DecompressionBombError,
+                Image.DecompressionBombWarning):
+            self.fail('decompression_bomb')
+        except OSError:
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+        max_side = settings.MAX_UPLOAD_IMAGE_SIDE
+        max_pixels = settings.MAX_UPLOAD_IMAGE_PIXELS
+        if (width > max_side or height > max_side
+                or width * height > max_pixels):
+            self.fail('too_many_pixels', width=width, height=height,
+                      max_side=max_side, max_pixels=max_pixels)
+        extension = 'jpg' if image_format == 'jpeg' else image_format
+        if extension not in self.ALLOWED_TYPES:
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+        upload.seek(0)
+        return extension
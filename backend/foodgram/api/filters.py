@@ -1,8 +1,9 @@
 import django_filters as filters
 from django.contrib.auth import get_user_model
+from django_filters.widgets import BooleanWidget
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipes
+from recipes.models import Favorite, Recipes, ShoppingCart
 
 User = get_user_model()
 
@@ -18,10 +19,11 @@ class RecipeFilter(filters.FilterSet):
     author = filters.ModelChoiceFilter(
         queryset=User.objects.all())
 
-    is_favorited = filters.BooleanFilter(method='filter_is_favorited')
-    is_in_shopping_cart = filters.NumberFilter(
-        method='filter_is_in_shopping_cart'
-    )
+    # BooleanWidget понимает и true/false, и 1/0 от фронтенда.
+    is_favorited = filters.BooleanFilter(
+        method='filter_is_favorited', widget=BooleanWidget())
+    is_in_shopping_cart = filters.BooleanFilter(
+        method='filter_is_in_shopping_cart', widget=BooleanWidget())
 
     class Meta:
         model = Recipes
@@ -29,12 +31,12 @@ class RecipeFilter(filters.FilterSet):
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            cart_recipes_ids = self.request.user.shopping_cart.values_list(
-                'recipe__id', flat=True)
-            return Recipes.objects.filter(id__in=cart_recipes_ids)
+            return queryset.filter(pk__in=ShoppingCart.objects.filter(
+                user=self.request.user).values('recipe_id'))
         return queryset
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorite_list__user=self.request.user)
+            return queryset.filter(pk__in=Favorite.objects.filter(
+                user=self.request.user).values('recipe_id'))
         return queryset
@@ -0,0 +1,48 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import CachedTokenAuthentication, token_cache
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает число запросов и время аутентификации '
+            'TokenAuthentication и CachedTokenAuthentication.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email='bench-auth@example.com', username='bench-auth',
+                first_name='Bench', last_name='Auth', password='bench-auth')
+            token = Token.objects.create(user=user)
+            request = APIRequestFactory().get(
+                '/api/recipes/', HTTP_AUTHORIZATION=f'Token {token.key}')
+            token_cache.clear()
+            for auth_class in (TokenAuthentication,
+                               CachedTokenAuthentication):
+                self.measure(auth_class(), request, options['requests'])
+            transaction.set_rollback(True)
+        token_cache.clear()
+
+    def measure(self, authentication, request, count):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(count):
+                authentication.authenticate(request)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{authentication.__class__.__name__:>27}: '
+            f'{len(queries) / count:.3f} запроса на вызов, '
+            f'{elapsed / count * 1_000_000:.1f} мкс на вызов'
+        )
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from foodgram.compression import available_encodings
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает объём ответа и время до последнего байта '
+            'без сжатия и с gzip/brotli.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            default=['/api/recipes/?limit=50'])
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--bandwidth', type=float, default=10.0,
+                            help='Скорость канала клиента, Мбит/с.')
+        parser.add_argument('--token', help='Токен для закрытых эндпоинтов.')
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['token']:
+            headers['HTTP_AUTHORIZATION'] = f'Token {options["token"]}'
+        elif Token.objects.exists():
+            token = Token.objects.first()
+            headers['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        client = Client()
+        bytes_per_second = options['bandwidth'] * 1_000_000 / 8
+        for path in options['paths']:
+            self.stdout.write(path)
+            for encoding in ('identity',) + available_encodings():
+                size, server_time = self.measure(
+                    client, path, encoding, options['runs'], headers)
+                ttlb = server_time + size / bytes_per_second
+                self.stdout.write(
+                    f'  {encoding:>8}: {size:>9} байт, '
+                    f'сервер {server_time * 1000:7.2f} мс, '
+                    f'TTLB {ttlb * 1000:8.2f} мс'
+                )
+
+    def measure(self, client, path, encoding, runs, headers):
+        size, elapsed = 0, 0.0
+        for _ in range(runs):
+            start = time.perf_counter()
+            response = client.get(
+                path, HTTP_ACCEPT_ENCODING=encoding, **headers)
+            if response.streaming:
+                body = b''.join(response.streaming_content)
+            else:
+                body = response.content
+            elapsed += time.perf_counter() - start
+            size = len(body)
+        return size, elapsed / runs
@@ -0,0 +1,120 @@
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+
+from recipes import feed
+from recipes.bulk import write_rows
+from recipes.models import FeedEntry, Recipes
+from users.models import Subscription
+
+User = get_user_model()
+
+START_DATE = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def read_pull_only(user, limit, cursor=None):
+    """Лента одним запросом по всем подпискам, без FeedEntry."""
+    return list(Recipes.objects.filter(
+        feed.published_before(cursor),
+        author__in=Subscription.objects.filter(user=user).values('author'),
+    ).order_by('-pub_date', '-id').values_list('pub_date', 'id')[
+        :limit + 1])
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ленту подписок с рассылкой по FeedEntry и сборку '
+            'ленты одним запросом для читателя с большим числом подписок. '
+            'Данные создаются в транзакции и откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--follows', type=int, default=1000)
+        parser.add_argument('--recipes-per-author', type=int, default=20)
+        parser.add_argument(
+            '--popular', type=int, default=10,
+            help='Сколько авторов из подписок собираются при чтении.')
+        parser.add_argument('--limit', type=int, default=6)
+        parser.add_argument('--pages', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            reader = self.create_data(options)
+            for label, read in (('FeedEntry + популярные', feed.read),
+                                ('один запрос', read_pull_only)):
+                self.measure(label, read, reader, options)
+            transaction.set_rollback(True)
+
+    def create_data(self, options):
+        rng = Random(options['seed'])
+        started = time.perf_counter()
+        reader = User.objects.create_user(
+            email='bench-feed@example.com', username='bench-feed',
+            first_name='Bench', last_name='Feed', password='bench-feed')
+        first_user = reader.pk + 1
+        authors = [
+            User(id=first_user + index, username=f'bench-feed-{index}',
+                 email=f'bench-feed-{index}@example.com',
+                 first_name='Bench', last_name='Author',
+                 feed_fanout=index >= options['popular'])
+            for index in range(options['follows'])
+        ]
+        User.objects.bulk_create(authors)
+        Subscription.objects.bulk_create(
+            Subscription(user=reader, author=author) for author in authors)
+
+        first_recipe = (Recipes.objects.aggregate(last=Max('id'))['last']
+                        or 0) + 1
+        period = 365 * 24 * 3600
+        recipes, entries = [], []
+        for author in authors:
+            for _ in range(options['recipes_per_author']):
+                recipe_id = first_recipe + len(recipes)
+                pub_date = START_DATE + timedelta(
+                    seconds=rng.randrange(period))
+                recipes.append((recipe_id, author.pk, 'Рецепт',
+                                'placeholder.jpg', 'Текст', 10, pub_date, 0))
+                if author.feed_fanout:
+                    entries.append((reader.pk, recipe_id, author.pk,
+                                    pub_date))
+        write_rows(Recipes, ('id', 'author_id', 'name', 'image', 'text',
+                             'cooking_time', 'pub_date', 'favorites_count'),
+                   recipes, 5000)
+        write_rows(FeedEntry, ('user_id', 'recipe_id', 'author_id',
+                               'pub_date'), entries, 5000)
+        self.stdout.write(
+            f'Подписок: {len(authors)}, рецептов: {len(recipes)}, '
+            f'записей ленты: {len(entries)}, популярных авторов: '
+            f'{options["popular"]} ({time.perf_counter() - started:.1f} с)')
+        return reader
+
+    def measure(self, label, read, reader, options):
+        limit = options['limit']
+        first_pages, deep_pages, pages_read = [], [], None
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(options['repeat']):
+                cursor, pages = None, []
+                for _ in range(options['pages']):
+                    start = time.perf_counter()
+                    entries = read(reader, limit, cursor)
+                    pages.append(time.perf_counter() - start)
+                    if len(entries) <= limit:
+                        break
+                    cursor = entries[limit - 1]
+                first_pages.append(pages[0])
+                deep_pages.append(pages[-1])
+                pages_read = len(pages)
+        per_page = len(queries) / (options['repeat'] * pages_read)
+        self.stdout.write(
+            f'{label:>24}: первая страница '
+            f'{statistics.median(first_pages) * 1000:.2f} мс, '
+            f'страница {pages_read} '
+            f'{statistics.median(deep_pages) * 1000:.2f} мс, '
+            f'{per_page:.1f} запроса на страницу')
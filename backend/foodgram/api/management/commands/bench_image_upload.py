@@ -0,0 +1,47 @@
+import base64
+import io
+import os
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from api.fields import StreamingBase64ImageField
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пиковую память Python при разборе base64-картинки '
+            'стандартным и потоковым полем.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sides', type=int, nargs='+',
+                            default=[500, 1000, 2000, 3000])
+
+    def handle(self, *args, **options):
+        for side in options['sides']:
+            payload = self.make_payload(side)
+            self.stdout.write(
+                f'{side}x{side}, base64 {len(payload) // 1024} КБ:')
+            for field_class in (Base64ImageField, StreamingBase64ImageField):
+                peak = self.measure(field_class(), payload)
+                self.stdout.write(
+                    f'  {field_class.__name__:>26}: пик {peak // 1024} КБ')
+
+    def make_payload(self, side):
+        image = Image.frombytes('RGB', (side, side),
+                                os.urandom(side * side * 3))
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=1)
+        return ('data:image/png;base64,'
+                + base64.b64encode(buffer.getvalue()).decode())
+
+    def measure(self, field, payload):
+        tracemalloc.start()
+        try:
+            upload = field.to_internal_value(payload)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        upload.close()
+        return peak
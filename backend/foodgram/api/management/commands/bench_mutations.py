@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipes
+
+User = get_user_model()
+
+BENCH_USERNAME = 'bench_mutations'
+
+
+class Command(BaseCommand):
+    help = ('Отправляет одновременные POST и DELETE избранного, корзины и '
+            'подписки из многих потоков и проверяет, что ровно один запрос '
+            'успешен, остальные получают 400, а ошибок 500 нет.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        recipe = Recipes.objects.order_by('id').first()
+        if recipe is None:
+            raise CommandError('Нет рецептов, выполните generate_data.')
+        # Остаток прогона, прерванного до удаления пользователя.
+        User.objects.filter(username=BENCH_USERNAME).delete()
+        user = User.objects.create_user(
+            username=BENCH_USERNAME, email=f'{BENCH_USERNAME}@example.com',
+            password=None)
+        endpoints = (
+            ('избранное', f'/api/recipes/{recipe.pk}/favorite/'),
+            ('корзина', f'/api/recipes/{recipe.pk}/shopping_cart/'),
+            ('подписка', f'/api/users/{recipe.author_id}/subscribe/'),
+        )
+        rates = {scope: None for scope in settings.REST_FRAMEWORK[
+            'DEFAULT_THROTTLE_RATES']}
+        failed = False
+        try:
+            with override_settings(REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK,
+                    'DEFAULT_THROTTLE_RATES': rates}):
+                for label, url in endpoints:
+                    self.count_queries(label, user, url)
+                    failed |= self.race(label, user, url, options)
+        finally:
+            user.delete()
+        recipe.refresh_from_db()
+        favorites = Favorite.objects.filter(recipe=recipe).count()
+        if recipe.favorites_count != favorites:
+            failed = True
+            self.stdout.write(f'favorites_count {recipe.favorites_count} '
+                              f'не совпадает с числом избранного {favorites}')
+        if failed:
+            raise CommandError('Обнаружены гонки или ошибки 500.')
+
+    def client(self, user):
+        client = APIClient(raise_request_exception=False)
+        client.force_authenticate(user)
+        return client
+
+    def count_queries(self, label, user, url):
+        client = self.client(user)
+        for method in ('post', 'delete'):
+            with CaptureQueriesContext(connection) as queries:
+                getattr(client, method)(url)
+            writes = [query['sql'] for query in queries.captured_queries
+                      if query['sql'].startswith(('INSERT', 'DELETE',
+                                                  'UPDATE'))]
+            self.stdout.write(
+                f'{label} {method.upper()}: запросов {len(queries)}, '
+                f'из них изменений {len(writes)}')
+
+    def race(self, label, user, url, options):
+        """Раунды одновременных POST, затем DELETE; True при ошибке."""
+        failed = False
+        elapsed = Counter()
+        for _ in range(options['rounds']):
+            for method, success in (('post', 201), ('delete', 204)):
+                seconds, statuses = self.run_threads(
+                    user, url, method, options['threads'])
+                elapsed[method] += seconds
+                expected = Counter(
+                    {success: 1, 400: options['threads'] - 1})
+                if statuses != expected:
+                    failed = True
+                    self.stdout.write(f'{label} {method.upper()}: '
+                                      f'{dict(statuses)}, ожидалось '
+                                      f'{dict(expected)}')
+        for method, seconds in elapsed.items():
+            self.stdout.write(
+                f'{label} {method.upper()}: {options["rounds"]} раундов по '
+                f'{options["threads"]} потоков, '
+                f'{seconds / options["rounds"]:.3f} с на раунд')
+        return failed
+
+    def run_threads(self, user, url, method, threads_count):
+        statuses = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads_count)
+
+        def worker():
+            client = self.client(user)
+            barrier.wait()
+            try:
+                status = getattr(client, method)(url).status_code
+            finally:
+                connections.close_all()
+            with lock:
+                statuses[status] += 1
+
+        threads = [threading.Thread(target=worker)
+                   for _ in range(threads_count)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, statuses
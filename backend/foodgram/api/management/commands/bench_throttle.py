@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from api.throttling import TokenBucketThrottle, local_store, shared_store
+
+
+class Command(BaseCommand):
+    help = ('Измеряет время проверки TokenBucketThrottle на запрос '
+            'с хранилищем в памяти процесса и в общем кэше, с пачками '
+            'и без них.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100000)
+        parser.add_argument(
+            '--clients', type=int, default=1000,
+            help='Число разных IP-адресов в потоке запросов.')
+
+    def handle(self, *args, **options):
+        view = APIView()
+        shared, batch = settings.THROTTLE_SHARED, shared_store.batch
+        try:
+            for subnet, (label, shared_mode, batch_size) in enumerate((
+                    ('память процесса', False, batch),
+                    ('общий кэш', True, batch),
+                    ('кэш без пачек', True, 0))):
+                settings.THROTTLE_SHARED = shared_mode
+                shared_store.batch = batch_size
+                local_store.clear()
+                shared_store.clear()
+                # У каждого режима свои адреса: счётчики прошлого режима
+                # остаются в общем кэше до конца окна.
+                requests = self.make_requests(subnet, options['clients'])
+                self.measure(label, requests, view, options['requests'])
+        finally:
+            settings.THROTTLE_SHARED = shared
+            shared_store.batch = batch
+            local_store.clear()
+            shared_store.clear()
+
+    def make_requests(self, subnet, clients):
+        factory = APIRequestFactory()
+        requests = []
+        for index in range(clients):
+            request = Request(factory.get(
+                '/api/recipes/', REMOTE_ADDR=f'10.{subnet}.{index // 256}.'
+                                             f'{index % 256}'))
+            request.user = AnonymousUser()
+            requests.append(request)
+        return requests
+
+    def measure(self, label, requests, view, count):
+        throttle = TokenBucketThrottle()
+        denied = 0
+        start = time.perf_counter()
+        for index in range(count):
+            if not throttle.allow_request(
+                    requests[index % len(requests)], view):
+                denied += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{label:>16}: {elapsed / count * 1_000_000:.2f} мкс на запрос, '
+            f'отклонено {denied} из {count}')
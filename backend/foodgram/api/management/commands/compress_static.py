@@ -0,0 +1,25 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodgram.compression import COMPRESSIBLE_SUFFIXES, compress_file
+
+
+class Command(BaseCommand):
+    help = 'Создаёт сжатые копии (.gz/.br) собранной статики для nginx.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--root', default=settings.STATIC_ROOT)
+        parser.add_argument('--min-size', type=int,
+                            default=settings.COMPRESSION_MIN_SIZE)
+
+    def handle(self, *args, **options):
+        created = 0
+        for directory, _, files in os.walk(options['root']):
+            for name in files:
+                if not name.endswith(COMPRESSIBLE_SUFFIXES):
+                    continue
+                created += compress_file(
+                    os.path.join(directory, name), options['min_size'])
+        self.stdout.write(f'Создано сжатых файлов: {created}')
@@ -0,0 +1,90 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from recipes.models import Favorite, Ingredient, Recipes, ShoppingCart, Tag
+from users.models import Subscription
+
+User = get_user_model()
+
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+}
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для основных запросов API и падает, если '
+            'какой-то из них полностью читает большую таблицу.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=10000,
+            help='Последовательное чтение таблиц меньше этого размера '
+                 'допускается.')
+        parser.add_argument('--verbose-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'EXPLAIN для {connection.vendor} не поддерживается.')
+        failures = []
+        tables = set(connection.introspection.table_names())
+        table_sizes = {}
+        for name, queryset in self.canonical_queries():
+            plan = queryset.explain()
+            if options['verbose_plans']:
+                self.stdout.write(f'{name}:\n{plan}\n')
+            scanned = []
+            for table in sorted(set(pattern.findall(plan)) & tables):
+                if table not in table_sizes:
+                    table_sizes[table] = self.table_size(table)
+                if table_sizes[table] >= options['min_rows']:
+                    scanned.append(f'{table} ({table_sizes[table]} строк)')
+            if scanned:
+                failures.append(
+                    f'{name}: полное чтение {", ".join(scanned)}')
+            self.stdout.write(f'{name}: {"SEQ SCAN" if scanned else "OK"}')
+        if failures:
+            raise CommandError('\n'.join(failures))
+
+    def canonical_queries(self):
+        user = User.objects.order_by('pk').first()
+        author = Recipes.objects.values_list('author', flat=True).first()
+        tag = Tag.objects.values_list('slug', flat=True).first() or 'tag'
+        return (
+            ('recipes_list', Recipes.objects.order_by('-pub_date')[:6]),
+            ('recipes_by_tag', Recipes.objects.filter(
+                tags__slug=tag).order_by('-pub_date')[:6]),
+            ('author_recipes', Recipes.objects.filter(
+                author_id=author).order_by('-pub_date')[:3]),
+            ('favorites', Recipes.objects.filter(pk__in=Favorite.objects.filter(
+                user=user).values('recipe_id')).order_by('-pub_date')[:6]),
+            ('shopping_cart', Recipes.objects.filter(
+                pk__in=ShoppingCart.objects.filter(
+                    user=user).values('recipe_id'))[:6]),
+            ('shopping_list', ShoppingCart.objects.filter(user=user).values(
+                'recipe__ingredients_amount__ingredient__name',
+                'recipe__ingredients_amount__ingredient__measurement_unit'
+            ).annotate(amount=Sum('recipe__ingredients_amount__amount'))),
+            ('ingredient_search', Ingredient.objects.filter(
+                name__istartswith='са')),
+            ('subscriptions', Subscription.objects.filter(
+                user=user).order_by('pk')[:10]),
+        )
+
+    def table_size(self, table):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [table])
+                row = cursor.fetchone()
+                return int(row[0]) if row else 0
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            return cursor.fetchone()[0]
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Запуск в отдельном процессе: в текущем всё уже импортировано.
+SCRIPT = '''
+import resource, sys, time
+for name in {blocked!r}:
+    sys.modules[name] = None
+started = time.perf_counter()
+import {module}
+from django.urls import get_resolver
+get_resolver().url_patterns
+loaded = time.perf_counter() - started
+first_request = 0
+if {path!r}:
+    from django.test import Client
+    started = time.perf_counter()
+    Client(HTTP_HOST='localhost').get({path!r})
+    first_request = time.perf_counter() - started
+print(loaded, first_request,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+'''
+
+
+def parse_importtime(stderr):
+    """Строки python -X importtime: (собственное время, модуль)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line.split(':', 1)[1].split('|')
+        rows.append((int(own), name.strip()))
+    return rows
+
+
+class Command(BaseCommand):
+    help = ('Измеряет время запуска приложения и первого запроса, '
+            'память процесса и модули, дольше всего импортируемые '
+            'при старте (python -X importtime).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='foodgram.wsgi')
+        parser.add_argument(
+            '--request', default='',
+            help='Путь первого запроса, например /api/tags/.')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--block', nargs='*', default=[],
+            help='Модули, отсутствие которых нужно смоделировать.')
+
+    def handle(self, *args, **options):
+        script = SCRIPT.format(module=options['module'],
+                               path=options['request'],
+                               blocked=options['block'])
+        runs = []
+        for _ in range(options['repeat']):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', script],
+                capture_output=True, text=True, env=os.environ.copy())
+            if result.returncode:
+                raise CommandError(result.stderr[-2000:])
+            loaded, first_request, maxrss = result.stdout.split()[-3:]
+            runs.append((float(loaded), float(first_request), int(maxrss),
+                         parse_importtime(result.stderr)))
+        loaded, first_request, maxrss, rows = min(runs, key=lambda run: run[0])
+        self.stdout.write(
+            f'Загрузка {options["module"]} и URLconf: {loaded * 1000:.0f} мс, '
+            f'модулей {len(rows)}, RSS {maxrss / 1024:.1f} МБ')
+        if options['request']:
+            self.stdout.write(f'Первый запрос {options["request"]}: '
+                              f'{first_request * 1000:.0f} мс')
+        packages = Counter()
+        for own, name in rows:
+            packages[name.split('.')[0]] += own
+        self.stdout.write('\nПакеты по собственному времени импорта:')
+        for name, own in packages.most_common(options['top']):
+            self.stdout.write(f'{own / 1000:9.1f} мс  {name}')
+        self.stdout.write('\nМодули:')
+        for own, name in sorted(rows, reverse=True)[:options['top']]:
+            self.stdout.write(f'{own / 1000:9.1f} мс  {name}')
@@ -0,0 +1,65 @@
+import io
+import os
+import pstats
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram.profiling import CPROFILE_SUFFIX, profile_files
+
+
+class Command(BaseCommand):
+    help = ('Список профилей запросов, вывод профиля по имени или '
+            'удаление старых профилей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'name', nargs='?',
+            help='Имя профиля: speedscope.json выводится как есть, для '
+                 '.prof печатается сводка pstats.')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--sort', default='cumulative',
+            help='Сортировка сводки pstats.')
+        parser.add_argument(
+            '--delete-older', type=float, metavar='DAYS',
+            help='Удалить профили старше указанного числа дней.')
+
+    def handle(self, *args, **options):
+        if options['delete_older'] is not None:
+            return self.delete_older(options['delete_older'])
+        if options['name']:
+            return self.show(options['name'], options)
+        entries = profile_files()
+        if not entries:
+            self.stdout.write(f'Профилей в {settings.PROFILING_DIR} нет.')
+            return
+        for entry in entries[:options['limit']]:
+            stat = entry.stat()
+            created = time.strftime('%Y-%m-%d %H:%M:%S',
+                                    time.localtime(stat.st_mtime))
+            self.stdout.write(
+                f'{created}  {stat.st_size // 1024:>6} КБ  {entry.name}')
+
+    def show(self, name, options):
+        path = os.path.join(settings.PROFILING_DIR, os.path.basename(name))
+        if not os.path.isfile(path):
+            raise CommandError(f'Профиль {name} не найден.')
+        if path.endswith(CPROFILE_SUFFIX):
+            buffer = io.StringIO()
+            stats = pstats.Stats(path, stream=buffer)
+            stats.sort_stats(options['sort']).print_stats(options['limit'])
+            self.stdout.write(buffer.getvalue())
+            return
+        with open(path, encoding='utf-8') as file:
+            self.stdout.write(file.read())
+
+    def delete_older(self, days):
+        border = time.time() - days * 24 * 3600
+        deleted = 0
+        for entry in profile_files():
+            if entry.stat().st_mtime < border:
+                os.remove(entry.path)
+                deleted += 1
+        self.stdout.write(f'Удалено профилей: {deleted}')
@@ -0,0 +1,60 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.db_routers import (is_pinned, replica_configured,
+                                 reset_read_routing, route_reads_to_replica)
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы читают из реплики, если нет свежих записей."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS and replica_configured()
+                and not is_pinned(request.user)):
+            self._replica_token = route_reads_to_replica()
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                reset_read_routing(self._replica_token)
+
+
+def _split_param(value):
+    if not value:
+        return set()
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Выбор полей через ?fields=, ?expand= и ?omit=.
+
+    Невыбранные поля удаляются до сериализации и не вычисляются.
+    Поля из ?fields= выводятся всегда, ?expand= добавляет к ним
+    вложенные поля из expandable_fields. Без ?fields= ?expand=
+    оставляет из expandable_fields только перечисленные.
+    """
+    expandable_fields = ()
+
+    @classmethod
+    def get_selected_fields(cls, request):
+        names = set(cls.Meta.fields)
+        if request is None:
+            return names
+        params = request.query_params
+        fields = _split_param(params.get('fields'))
+        expandable = set(cls.expandable_fields)
+        expand = _split_param(params.get('expand')) & expandable
+        if fields:
+            names &= fields | expand
+        elif expand:
+            names -= expandable - expand
+        return names - _split_param(params.get('omit'))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.get_selected_fields(self.context.get('request'))
+        for name in set(self.fields) - selected:
+            self.fields.pop(name)
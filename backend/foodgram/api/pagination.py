@@ -1,6 +1,73 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class FeedCursorPagination(BasePagination):
+    """Курсор по (pub_date, id) последнего рецепта страницы.
+
+    Глубокие страницы стоят столько же, сколько первая, а новые
+    рецепты не сдвигают уже прочитанные.
+    """
+    page_size = 6
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, pk = base64.urlsafe_b64decode(
+                encoded.encode('ascii')).decode('ascii').split('|')
+            return datetime.fromisoformat(pub_date), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        pub_date, pk = position
+        value = f'{pub_date.isoformat()}|{pk}'.encode('ascii')
+        return base64.urlsafe_b64encode(value).decode('ascii')
+
+    def paginate_entries(self, load_page, request):
+        """Страница из load_page(limit, cursor), который отдаёт limit + 1.
+
+        Лишняя запись означает, что есть следующая страница.
+        """
+        limit = self.get_page_size(request)
+        entries = load_page(limit, self.decode_cursor(request))
+        url = request.build_absolute_uri()
+        self.next_link = None
+        if len(entries) > limit:
+            self.next_link = replace_query_param(
+                url, self.cursor_query_param,
+                self.encode_cursor(entries[limit - 1]))
+        self.previous_link = (
+            remove_query_param(url, self.cursor_query_param)
+            if self.cursor_query_param in request.query_params else None)
+        return entries[:limit]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data,
+        })
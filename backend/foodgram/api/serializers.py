@@ -1,17 +1,88 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import F
-from django.shortcuts import get_object_or_404
+from django.db import models, transaction
+from django.db.models import F, Prefetch, prefetch_related_objects
+from django.http import Http404
 from djoser.serializers import UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from api.fields import StreamingBase64ImageField
+from api.mixins import SparseFieldsMixin
+from foodgram.db_routers import pin_to_primary
 from recipes.models import (Favorite, Ingredient, RecipeIngredient, Recipes,
                             ShoppingCart, Tag)
+from recipes.tasks import delete_unused_image
+from users.models import Subscription
 
 User = get_user_model()
 
 
+class UserProfileListSerializer(serializers.ListSerializer):
+    """Список пользователей: подписки на всех одним запросом."""
+
+    def to_representation(self, data):
+        users = data.all() if isinstance(data, models.Manager) else data
+        UserProfileSerializer.load_subscriptions(
+            self.context, [user.pk for user in users])
+        return super().to_representation(users)
+
+
+class UserProfileSerializer(UserSerializer):
+    """Пользователь с признаком подписки текущего пользователя на него.
+
+    Представление каждого пользователя строится один раз за запрос
+    и хранится в контексте: автор нескольких рецептов на странице
+    сериализуется только при первой встрече.
+    """
+    is_subscribed = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = ('email', 'id', 'username', 'first_name', 'last_name',
+                  'is_subscribed')
+        list_serializer_class = UserProfileListSerializer
+
+    @staticmethod
+    def load_subscriptions(context, author_ids):
+        """Подписки текущего пользователя на ещё не проверенных авторов."""
+        subscriptions = context.setdefault('subscriptions', {})
+        missing = set(author_ids) - subscriptions.keys()
+        if not missing:
+            return subscriptions
+        request = context.get('request')
+        subscribed = set()
+        if request is not None and request.user.is_authenticated:
+            # На себя подписаться нельзя, запрос для профиля не нужен.
+            authors = missing - {request.user.pk}
+            if authors:
+                subscribed = set(Subscription.objects.filter(
+                    user=request.user, author_id__in=authors
+                ).values_list('author_id', flat=True))
+        for author_id in missing:
+            subscriptions[author_id] = author_id in subscribed
+        return subscriptions
+
+    def get_is_subscribed(self, obj):
+        return self.load_subscriptions(self.context, [obj.pk])[obj.pk]
+
+    def to_representation(self, instance):
+        profiles = self.context.setdefault('user_profiles', {})
+        if instance.pk not in profiles:
+            profiles[instance.pk] = super().to_representation(instance)
+        return profiles[instance.pk]
+
+
+class RecipesReadListSerializer(serializers.ListSerializer):
+    """Список рецептов: подписки на всех авторов страницы одним запросом."""
+
+    def to_representation(self, data):
+        recipes = data.all() if isinstance(data, models.Manager) else data
+        if 'author' in self.child.fields:
+            UserProfileSerializer.load_subscriptions(
+                self.context, [recipe.author_id for recipe in recipes])
+        return super().to_representation(recipes)
+
+
 class TagsSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -55,11 +126,11 @@ class RecipeIngredientReadSerializer(serializers.ModelSerializer):
         return obj.ingredient.measurement_unit
 
 
-class RecipesReadSerializer(serializers.ModelSerializer):
+class RecipesReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     tags = TagsSerializer(many=True)
     ingredients = serializers.SerializerMethodField()
-    author = UserSerializer()
+    author = UserProfileSerializer()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -79,6 +150,8 @@ class RecipesReadSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ['tags', 'author', 'name', 'image',
                             'text', 'id', 'ingredients', 'cooking_time']
+        list_serializer_class = RecipesReadListSerializer
+    expandable_fields = ('author', 'ingredients')
 
     def get_image(self, obj):
         return obj.image.url
@@ -89,12 +162,16 @@ class RecipesReadSerializer(serializers.ModelSerializer):
         ).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'favorited'):
+            return obj.favorited
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
         return Favorite.objects.filter(recipe=obj, user=request.user).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'in_shopping_cart'):
+            return obj.in_shopping_cart
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -105,11 +182,11 @@ class RecipesReadSerializer(serializers.ModelSerializer):
 class RecipesWriteSerializer(serializers.ModelSerializer):
     tags = TagsSerializer(many=True, read_only=True)
     ingredients = RecipeIngredientWriteSerializer(many=True)
-    author = UserSerializer(
+    author = UserProfileSerializer(
         read_only=True,
         default=serializers.CurrentUserDefault()
     )
-    image = Base64ImageField(max_length=None, use_url=True)
+    image = StreamingBase64ImageField(max_length=None, use_url=True)
 
     class Meta:
         model = Recipes
@@ -117,16 +194,23 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
                   'ingredients', 'cooking_time')
 
     def to_representation(self, instance):
+        # Ингредиенты с названиями и теги - двумя запросами, а не по
+        # запросу на ингредиент.
+        prefetch_related_objects([instance], 'tags', Prefetch(
+            'ingredients_amount',
+            queryset=RecipeIngredient.objects.select_related('ingredient')))
         serializer = RecipesReadSerializer(instance, context=self.context)
         return serializer.data
 
     def add_ingredients(self, recipe, ingredients):
+        found = Ingredient.objects.in_bulk(
+            [ingr.get('id') for ingr in ingredients])
+        if len(found) != len(ingredients):
+            raise Http404('Ингредиент не найден.')
         RecipeIngredient.objects.bulk_create([
             RecipeIngredient(
                 recipe=recipe,
-                ingredient=get_object_or_404(
-                    Ingredient,
-                    pk=ingr.get('id')),
+                ingredient=found[ingr.get('id')],
                 amount=ingr.get('amount')
             ) for ingr in ingredients
         ])
@@ -152,6 +236,7 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
             raise ValidationError('Время приготовления должно быть больше 0')
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = self.initial_data.get('tags')
@@ -164,8 +249,12 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         )
         new_recipe.tags.set(tags)
         self.add_ingredients(new_recipe, ingredients)
+        pin_to_primary(author)
+        # Новый рецепт ещё никто не добавил в избранное и покупки.
+        new_recipe.favorited = new_recipe.in_shopping_cart = False
         return new_recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         if "ingredients" in validated_data:
             ingredients = validated_data.pop("ingredients")
@@ -173,7 +262,13 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
             self.add_ingredients(recipe, ingredients)
         tags = self.initial_data.pop("tags")
         recipe.tags.set(tags)
-        return super().update(recipe, validated_data)
+        pin_to_primary(recipe.author)
+        old_image = recipe.image.name
+        recipe = super().update(recipe, validated_data)
+        if recipe.image.name != old_image:
+            delete_unused_image.enqueue(
+                countdown=settings.IMAGE_DELETE_DELAY, name=old_image)
+        return recipe
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -191,7 +286,7 @@ class RecipeListSerializer(serializers.ModelSerializer):
 
 
 class FollowRecipeSerializer(serializers.ModelSerializer):
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
 
     class Meta:
         model = Recipes
@@ -251,7 +346,7 @@ class Recipe1Serializer(serializers.ModelSerializer):
         queryset=Tag.objects.all()
     )
     ingredients = serializers.SerializerMethodField()
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
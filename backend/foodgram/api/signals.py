@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import forget_token, token_cache
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(user_logged_out)
+def forget_user_tokens(sender, instance=None, user=None, **kwargs):
+    """Сброс токенов пользователя при смене пароля, блокировке и выходе."""
+    user = instance or user
+    if user is None:
+        return
+    token_cache.delete_user(user.pk)
+    if settings.TOKEN_CACHE_SHARED:
+        for key in Token.objects.filter(user=user).values_list(
+                'key', flat=True):
+            forget_token(key)
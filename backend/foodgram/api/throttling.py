@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Эндпоинты djoser, к которым нельзя добавить throttle_scope.
+AUTH_URL_NAMES = frozenset((
+    'login', 'logout', 'user-list', 'user-set-password',
+    'user-reset-password', 'user-reset-password-confirm',
+))
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'120/min' -> (ёмкость корзины, токенов в секунду)."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+def refill(state, capacity, per_second, now):
+    """Списание токена из корзины.
+
+    Возвращает новое состояние и сколько секунд ждать до следующего
+    токена (0, если запрос пропущен).
+    """
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / per_second
+
+
+class LocalBucketStore:
+    """Корзины в памяти процесса: LRU ограниченного размера.
+
+    Вытесняются давно не использованные ключи, а их корзины к этому
+    времени обычно уже полные.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, per_second):
+        now = time.monotonic()
+        with self._lock:
+            state, wait = refill(self._buckets.get(key), capacity,
+                                 per_second, now)
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Счётчики в общем кэше (Redis, Memcached), общие для всех воркеров.
+
+    Вместо корзины токенов - скользящее окно длиной в период ставки:
+    запросы считаются атомарным incr в счётчике текущего окна, а
+    счётчик прошлого окна добавляется с весом оставшейся от него доли.
+    Отклонённый запрос вычитается обратно и не продлевает ограничение.
+    """
+
+    def consume(self, key, capacity, per_second):
+        window = capacity / per_second
+        index, offset = divmod(time.time(), window)
+        index = int(index)
+        count = self.add(key, index, window)
+        return self.check(key, index, offset, window, capacity, count,
+                          self.previous(key, index))
+
+    def add(self, key, index, window, hits=1):
+        """Добавляет запросы в счётчик окна и возвращает его значение."""
+        current_key = f'throttle:{key}:{index}'
+        try:
+            return cache.incr(current_key, hits)
+        except ValueError:
+            # Окна ещё нет; его мог создать параллельный запрос.
+            if cache.add(current_key, hits, int(window * 2) + 1):
+                return hits
+            return cache.incr(current_key, hits)
+
+    def previous(self, key, index):
+        return cache.get(f'throttle:{key}:{index - 1}', 0)
+
+    def check(self, key, index, offset, window, capacity, count, previous):
+        """0, если последний запрос в счётчике проходит, иначе ожидание."""
+        weight = 1 - offset / window
+        if count + previous * weight <= capacity:
+            return 0
+        cache.decr(f'throttle:{key}:{index}')
+        room = capacity - count
+        if room < 0 or not previous:
+            return window - offset
+        # Когда доля прошлого окна уменьшится настолько, чтобы хватило места.
+        return max(window * (1 - room / previous) - offset, 0.001)
+
+    def clear(self):
+        pass
+
+
+class BatchedBucketStore:
+    """Общие счётчики с быстрым путём в памяти процесса.
+
+    Вдали от лимита запросы пропускаются без обращения к кэшу и
+    копятся в процессе, а в общий счётчик уходят одним incr: когда
+    набралась пачка (THROTTLE_SYNC_BATCH, но не больше десятой части
+    лимита), прошло THROTTLE_SYNC_SECONDS или известный счётчик
+    достиг половины лимита - дальше каждый запрос идёт в кэш. Лимит
+    может быть превышен не больше чем на пачку на процесс.
+    """
+
+    def __init__(self, shared, maxsize, batch, interval):
+        self.shared = shared
+        self.maxsize = maxsize
+        self.batch = batch
+        self.interval = interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, per_second):
+        window = capacity / per_second
+        now = time.time()
+        index, offset = divmod(now, window)
+        index = int(index)
+        batch = min(self.batch, capacity // 10)
+        with self._lock:
+            entry = self._entries.get(key)
+            stale = 0
+            if entry is not None and entry['index'] != index:
+                if entry['index'] == index - 1:
+                    stale = entry['pending']
+                entry = None
+            if entry is None:
+                entry = {'index': index, 'count': 0, 'previous': None,
+                         'pending': 0, 'synced': 0}
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            previous = entry['previous']
+            if (previous is not None and entry['pending'] < batch
+                    and now - entry['synced'] < self.interval
+                    and (entry['count'] + entry['pending'] + 1
+                         + previous * (1 - offset / window)) * 2
+                    <= capacity):
+                entry['pending'] += 1
+                return 0
+            hits = entry['pending'] + 1
+            entry['pending'] = 0
+        if stale:
+            self.shared.add(key, index - 1, window, stale)
+        if previous is None:
+            previous = self.shared.previous(key, index)
+        count = self.shared.add(key, index, window, hits)
+        wait = self.shared.check(key, index, offset, window, capacity,
+                                 count, previous)
+        with self._lock:
+            entry['previous'] = previous
+            entry['count'] = max(entry['count'], count - bool(wait))
+            entry['synced'] = now
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def check_shared_cache():
+    """Ошибка при запуске, если общий кэш на деле у каждого процесса свой."""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.THROTTLE_SHARED and not settings.CACHE_SHARED:
+        raise ImproperlyConfigured(
+            f'THROTTLE_SHARED=True требует общего кэша с атомарным incr '
+            f'(Redis, Memcached), а CACHE_BACKEND={backend}. Задайте '
+            f'CACHE_BACKEND и CACHE_LOCATION или THROTTLE_SHARED=False.')
+
+
+local_store = LocalBucketStore(settings.THROTTLE_LOCAL_SIZE)
+shared_store = BatchedBucketStore(
+    CacheBucketStore(), settings.THROTTLE_LOCAL_SIZE,
+    settings.THROTTLE_SYNC_BATCH, settings.THROTTLE_SYNC_SECONDS)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение частоты запросов корзинами токенов по областям.
+
+    Область берётся из throttle_scope view или action, для djoser - по
+    имени URL, иначе по методу: anon_read, user_read или user_write.
+    Ёмкость и скорость корзины задаются DEFAULT_THROTTLE_RATES в виде
+    '120/min'; область без ставки или с пустой ставкой не ограничивается.
+    """
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if not rate:
+            return True
+        if request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+        store = shared_store if settings.THROTTLE_SHARED else local_store
+        capacity, per_second = parse_rate(rate)
+        self.wait_seconds = store.consume(f'{scope}:{ident}', capacity,
+                                          per_second)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        authenticated = request.user.is_authenticated
+        if request.method in SAFE_METHODS:
+            return 'user_read' if authenticated else 'anon_read'
+        match = request.resolver_match
+        if not authenticated or match and match.url_name in AUTH_URL_NAMES:
+            return 'auth'
+        return 'user_write'
@@ -1,7 +1,13 @@
+import logging
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import (Exists, F, FloatField, OuterRef, Prefetch,
+                              Sum)
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -12,66 +18,135 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import LimitPageNumberPagination
+from api.mixins import ReplicaReadMixin
+from api.pagination import FeedCursorPagination, LimitPageNumberPagination
 from api.permissions import IsAuthorOrReadOnly
 from api.serializers import (FollowSerializer, IngredientSerializer,
                              FavoriteSerializer, RecipeListSerializer,
-                             RecipesWriteSerializer, TagsSerializer)
-from recipes.models import Favorite, Ingredient, Recipes, ShoppingCart, Tag
-from logger.logger import add_logger
+                             RecipesReadSerializer, RecipesWriteSerializer,
+                             TagsSerializer)
+from foodgram.db_routers import pin_to_primary
+from foodgram.queries import delete_rows, insert_ignore
+from recipes import activity, feed
+from recipes.models import (ActivityDaily, Favorite, Ingredient,
+                            RecipeIngredient, Recipes, ShoppingCart,
+                            SimilarRecipe, Tag)
+from recipes.units import format_amount
+from users.models import Subscription
 
 User = get_user_model()
-logger = add_logger(__name__)
+SIMILAR_RECIPES_LIMIT = 10
+TRENDING_RECIPES_LIMIT = 20
+TRENDING_DAYS = 7
+TRENDING_MAX_DAYS = 90
+logger = logging.getLogger(__name__)
+
 
+def shopping_list_lines(ingredients, batch_size=100):
+    """Построчная выдача списка покупок пачками строк."""
+    lines = ['Список покупок: \n']
+    for number, ingr in enumerate(ingredients.iterator(), start=1):
+        lines.append(
+            f'{number}) {ingr["name"]} - {format_amount(ingr["amount"])} '
+            f'({ingr["unit"]}) \n'
+        )
+        if len(lines) >= batch_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
 
-class RecipesViewSet(viewsets.ModelViewSet):
+
+class RecipesViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Вывод рецептов."""
     queryset = Recipes.objects.all()
     filter_backends = (DjangoFilterBackend,)
-    filter_class = RecipeFilter
-    filterset_fields = ('tags',)
+    filterset_class = RecipeFilter
     permission_classes = (IsAuthorOrReadOnly,)
     pagination_class = LimitPageNumberPagination
+    throttle_scope = None
 
     def get_serializer_class(self):
         if self.action == 'favorite' or self.action == 'shopping_cart':
             return FavoriteSerializer
+        if self.action in ('list', 'retrieve', 'feed', 'trending'):
+            return RecipesReadSerializer
         return RecipesWriteSerializer
 
-    def get_queryset(self):
+    def get_read_queryset(self):
+        """Подгрузка только тех связей, которые попадут в ответ."""
         queryset = Recipes.objects.all()
-        author = self.request.user
-        if self.request.GET.get('is_favorited'):
-            favorite_recipes_ids = Favorite.objects.filter(
-                user=author).values('recipe_id')
-
-            return queryset.filter(pk__in=favorite_recipes_ids)
-
-        if self.request.GET.get('is_in_shopping_cart'):
-            cart_recipes_ids = ShoppingCart.objects.filter(
-                user=author).values('recipe_id')
-            return queryset.filter(pk__in=cart_recipes_ids)
+        fields = RecipesReadSerializer.get_selected_fields(self.request)
+        user = self.request.user
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'ingredients_amount',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient')
+            ))
+        if user.is_authenticated:
+            if 'is_favorited' in fields:
+                queryset = queryset.annotate(favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ))
+            if 'is_in_shopping_cart' in fields:
+                queryset = queryset.annotate(in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef('pk'))
+                ))
         return queryset
 
+    def get_queryset(self):
+        # is_favorited и is_in_shopping_cart фильтрует RecipeFilter.
+        if self.action in ('list', 'retrieve'):
+            return self.get_read_queryset()
+        return Recipes.objects.all()
+
     def add_in_list(self, model, user, pk):
-        if model.objects.filter(user=user, recipe__id=pk).exists():
-            logger.error(f'Рецепт уже добавлен в {model.__name__}')
+        """Рецепт выбирается для ответа только после удачной вставки."""
+        try:
+            with transaction.atomic():
+                added = insert_ignore(model, user_id=user.pk, recipe_id=pk)
+                if added and model is Favorite:
+                    Recipes.objects.filter(pk=pk).update(
+                        favorites_count=F('favorites_count') + 1)
+                if added:
+                    recipe = Recipes.objects.only(
+                        'id', 'name', 'image', 'cooking_time'
+                    ).filter(pk=pk).first()
+                    if recipe is None:
+                        # Откат вставки до проверки внешнего ключа.
+                        raise Http404
+        except IntegrityError:
+            # Рецепт удалён до фиксации, MySQL проверяет ключ сразу.
+            raise Http404
+        if not added:
+            logger.error('Рецепт уже добавлен в %s', model.__name__)
             return Response(
                 {'errors': f'Рецепт уже добавлен в {model.__name__}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        recipe = get_object_or_404(Recipes, pk=pk)
-        model.objects.create(user=user, recipe=recipe)
+        activity.record(model, user.pk, recipe.pk, added=True)
+        pin_to_primary(user)
         serializer = RecipeListSerializer(recipe)
         return Response(serializer.data,
                         status=status.HTTP_201_CREATED)
 
     def delete_in_list(self, model, user, pk):
-        obj = model.objects.filter(user=user, recipe__id=pk)
-        if obj.exists():
-            obj.delete()
+        with transaction.atomic():
+            deleted = delete_rows(model, user_id=user.pk, recipe_id=pk)
+            if deleted and model is Favorite:
+                Recipes.objects.filter(pk=pk).update(
+                    favorites_count=F('favorites_count') - 1)
+        if deleted:
+            activity.record(model, user.pk, pk, added=False)
+            pin_to_primary(user)
             return Response(status=status.HTTP_204_NO_CONTENT)
-        logger.error(f'Рецепт уже добавлен в {model.__name__}')
+        logger.error('Рецепт не добавлен в %s', model.__name__)
         return Response(
             {'errors': f'Рецепт не добавлен в {model.__name__}'},
             status=status.HTTP_400_BAD_REQUEST
@@ -92,23 +167,86 @@ class RecipesViewSet(viewsets.ModelViewSet):
         return self.delete_in_list(ShoppingCart, request.user, pk)
 
     @action(methods=['GET'], detail=False,
-            permission_classes=(IsAuthenticated,))
+            permission_classes=(IsAuthenticated,),
+            pagination_class=FeedCursorPagination)
+    def feed(self, request):
+        """Рецепты авторов из подписок, новые первыми."""
+        entries = self.paginator.paginate_entries(
+            lambda limit, cursor: feed.read(request.user, limit, cursor),
+            request)
+        ids = [pk for _, pk in entries]
+        recipes = self.get_read_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk=None):
+        """Похожие рецепты из таблицы, рассчитанной build_similarity."""
+        try:
+            limit = min(int(request.GET.get('limit', SIMILAR_RECIPES_LIMIT)),
+                        SIMILAR_RECIPES_LIMIT)
+        except ValueError:
+            limit = SIMILAR_RECIPES_LIMIT
+        recipes = [
+            item.similar for item in SimilarRecipe.objects.filter(
+                recipe_id=pk).select_related('similar').only(
+                'similar__id', 'similar__name', 'similar__image',
+                'similar__cooking_time').order_by('-score')[:max(limit, 0)]
+        ]
+        if not recipes:
+            get_object_or_404(Recipes.objects.only('id'), pk=pk)
+        return Response(RecipeListSerializer(recipes, many=True).data)
+
+    @action(methods=['GET'], detail=False)
+    def trending(self, request):
+        """Рецепты, чаще всего добавляемые в избранное и покупки за дни.
+
+        Считается по счётчикам compact_activity, а не по сырым событиям.
+        """
+        try:
+            days = min(max(int(request.GET.get('days', TRENDING_DAYS)), 1),
+                       TRENDING_MAX_DAYS)
+            limit = min(int(request.GET.get('limit', TRENDING_RECIPES_LIMIT)),
+                        TRENDING_RECIPES_LIMIT)
+        except ValueError:
+            days, limit = TRENDING_DAYS, TRENDING_RECIPES_LIMIT
+        since = timezone.localdate() - timedelta(days=days - 1)
+        ids = list(ActivityDaily.objects.filter(date__gte=since).values(
+            'recipe_id'
+        ).annotate(score=Sum(
+            F('favorites_added') - F('favorites_removed')
+            + F('cart_added') - F('cart_removed')
+        )).filter(score__gt=0).order_by(
+            '-score', '-recipe_id'
+        ).values_list('recipe_id', flat=True)[:max(limit, 0)])
+        recipes = self.get_read_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True)
+        return Response(serializer.data)
+
+    @action(methods=['GET'], detail=False,
+            permission_classes=(IsAuthenticated,), throttle_scope='export')
     def download_shopping_cart(self, request):
-        ingredients = request.user.shopping_cart.values(
-            'recipe__ingredients_amount__ingredient__name',
-            'recipe__ingredients_amount__ingredient__measurement_unit'
-        ).annotate(amount=Sum('recipe__ingredients_amount__amount'))
-        shopping_list = 'Список покупок: \n'
-        count_ingredients = 0
-        for ingr in ingredients:
-            count_ingredients += 1
-            shopping_list += (
-                f'{count_ingredients}) '
-                f'{ingr["recipe__ingredients_amount__ingredient__name"]} - '
-                f'{ingr["amount"]} '
-                f'({ingr["recipe__ingredients_amount__ingredient__measurement_unit"]}) \n'
-            )
-        response = HttpResponse(shopping_list, 'Content-Type: text/plain')
+        # Суммирование в базовых единицах: 1 кг и 300 г одного продукта
+        # дают одну строку 1300 г.
+        ingredient = 'recipe__ingredients_amount__ingredient__'
+        # Рецепт без ингредиентов дал бы строку с пустой суммой.
+        ingredients = request.user.shopping_cart.filter(
+            recipe__ingredients_amount__isnull=False
+        ).values(
+            name=F(f'{ingredient}name'), unit=F(f'{ingredient}base_unit')
+        ).annotate(amount=Sum(
+            F('recipe__ingredients_amount__amount')
+            * F(f'{ingredient}unit_factor'),
+            output_field=FloatField()
+        )).order_by('name', 'unit')
+        # Тело ответа читается после выхода из view, поэтому база
+        # фиксируется сейчас, пока действует маршрутизация запроса.
+        response = StreamingHttpResponse(
+            shopping_list_lines(ingredients.using(ingredients.db)),
+            content_type='text/plain; charset=utf-8'
+        )
         response['Content-Disposition'] = (
             f'attachment; '
             f'filename="{self.request.user.username} shopping list.txt"'
@@ -116,14 +254,14 @@ class RecipesViewSet(viewsets.ModelViewSet):
         return response
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class TagsViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Вывод тегов."""
     queryset = Tag.objects.all()
     serializer_class = TagsSerializer
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     """Вывод ингредиентов."""
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
@@ -139,26 +277,40 @@ class FollowUserView(APIView):
 
     def post(self, request, id):
         author = get_object_or_404(User, id=id)
-        if request.user.follower.filter(author=author).exists():
+        if author.pk == request.user.pk:
+            return Response(
+                {"errors": "Нельзя подписаться на самого себя"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            followed = insert_ignore(
+                Subscription, user_id=request.user.pk, author_id=author.pk)
+            if followed:
+                feed.backfill(request.user, author)
+        if not followed:
             logger.error("Вы уже подписаны на автора")
             return Response(
                 {"errors": "Вы уже подписаны на автора"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
         serializer = FollowSerializer(
-            request.user.follower.create(author=author),
+            Subscription(user=request.user, author=author),
             context={"request": request},
         )
+        pin_to_primary(request.user)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED
         )
 
     def delete(self, request, id):
         author = get_object_or_404(User, id=id)
-        if request.user.follower.filter(author=author).exists():
-            request.user.follower.filter(
-                author=author
-            ).delete()
+        with transaction.atomic():
+            unfollowed = delete_rows(
+                Subscription, user_id=request.user.pk, author_id=author.pk)
+            if unfollowed:
+                feed.remove_author(request.user, author)
+        if unfollowed:
+            pin_to_primary(request.user)
             return Response(status=status.HTTP_204_NO_CONTENT)
         logger.error("Автор отсутсвует в списке подписок")
         return Response(
@@ -167,7 +319,7 @@ class FollowUserView(APIView):
         )
 
 
-class SubscriptionsView(ListAPIView):
+class SubscriptionsView(ReplicaReadMixin, ListAPIView):
     """Выводи подписок."""
     serializer_class = FollowSerializer
     pagination_class = LimitOffsetPagination
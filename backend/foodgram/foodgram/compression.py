@@ -0,0 +1,105 @@
+import os
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+EXTENSIONS = {BROTLI: '.br', GZIP: '.gz'}
+COMPRESSIBLE_SUFFIXES = ('.css', '.js', '.json', '.map', '.svg', '.txt',
+                         '.html', '.xml', '.ico', '.eot', '.ttf')
+
+
+def available_encodings():
+    if brotli is None:
+        return (GZIP,)
+    return (BROTLI, GZIP)
+
+
+def parse_accept_encoding(header):
+    """Разбор Accept-Encoding в словарь {кодировка: q}."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """Выбор лучшей поддерживаемой кодировки для клиента."""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return media_type in settings.COMPRESSION_CONTENT_TYPES
+
+
+def compress(data, encoding):
+    if encoding == BROTLI:
+        return brotli.compress(data, quality=settings.BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """Сжатие потока со сбросом буфера после каждого куска."""
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = (compressor.compress(chunk)
+                + compressor.flush(zlib.Z_SYNC_FLUSH))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_file(path, min_size):
+    """Сжатие файла во все доступные кодировки, если это выгодно."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < min_size:
+        return 0
+    created = 0
+    for encoding in available_encodings():
+        target = path + EXTENSIONS[encoding]
+        if (os.path.exists(target)
+                and os.path.getmtime(target) >= os.path.getmtime(path)):
+            continue
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            continue
+        with open(target, 'wb') as destination:
+            destination.write(compressed)
+        created += 1
+    return created
@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA = 'replica'
+PRIMARY = 'default'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f'db:primary-pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """Закрепление чтений пользователя за основной базой после записи."""
+    if not replica_configured() or not user.is_authenticated:
+        return
+    cache.set(_pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and bool(cache.get(_pin_key(user.pk)))
+
+
+def route_reads_to_replica(enabled=True):
+    return _use_replica.set(enabled and replica_configured())
+
+
+def reset_read_routing(token):
+    _use_replica.reset(token)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Направление чтений внутри блока на реплику."""
+    token = route_reads_to_replica(enabled)
+    try:
+        yield
+    finally:
+        reset_read_routing(token)
+
+
+class PrimaryReplicaRouter:
+    """Роутер: запись в основную базу, безопасные чтения в реплику."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
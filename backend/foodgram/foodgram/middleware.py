@@ -0,0 +1,135 @@
+import logging
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework import exceptions
+from rest_framework.authentication import get_authorization_header
+
+from api.authentication import CachedTokenAuthentication
+from foodgram.compression import (choose_encoding, compress, compress_stream,
+                                  is_compressible)
+from foodgram.profiling import RequestProfiler, prune_profiles
+
+logger = logging.getLogger(__name__)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов gzip/brotli по заголовку Accept-Encoding.
+
+    HTML не сжимается, чтобы не открывать BREACH для CSRF-токенов админки.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирование отдельных запросов.
+
+    Включается флагом PROFILING_ENABLED. Запрос профилируется, если
+    сотрудник передал заголовок X-Profile или параметр ?profile=1, либо
+    попал в выборку PROFILING_SAMPLE_RATE. Профили сохраняются в
+    PROFILING_DIR, имя файла возвращается в заголовке X-Profile-Id
+    только сотруднику, который сам запросил профиль. В каталоге
+    остаются PROFILING_MAX_FILES последних профилей.
+    В одном процессе одновременно профилируется один запрос; запрошенный
+    профиль, пропущенный из-за этого, отмечается заголовком
+    X-Profile-Skipped.
+    Для потоковых ответов профиль не включает отдачу тела.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        requested = self.is_requested(request)
+        if not requested and not self.is_sampled():
+            return self.get_response(request)
+        if not self.lock.acquire(blocking=False):
+            response = self.get_response(request)
+            if requested:
+                logger.info('Профиль %s %s пропущен: процесс уже '
+                            'профилирует запрос', request.method,
+                            request.path)
+                response['X-Profile-Skipped'] = 'busy'
+            return response
+        try:
+            profiler = RequestProfiler()
+            started = time.perf_counter()
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+            name = profiler.save(
+                request, getattr(request, 'request_id', uuid.uuid4().hex),
+                time.perf_counter() - started)
+            prune_profiles(settings.PROFILING_MAX_FILES)
+        finally:
+            self.lock.release()
+        if requested:
+            response['X-Profile-Id'] = name
+        return response
+
+    def is_requested(self, request):
+        if ('HTTP_X_PROFILE' in request.META
+                or request.GET.get('profile') == '1'):
+            return self.is_staff(request)
+        return False
+
+    def is_sampled(self):
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def is_staff(self, request):
+        """Сотрудник по сессии или токену, без запроса к базе без флага."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].lower() != b'token':
+            return False
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(
+                auth[1].decode())
+        except (exceptions.AuthenticationFailed, UnicodeError):
+            return False
+        return user.is_staff
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, берущий число строк без фильтров из статистики Postgres.
+
+    На больших таблицах COUNT(*) читает всю таблицу, а reltuples
+    достаточно точен для навигации по страницам админки.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where:
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples FROM pg_class WHERE relname = %s',
+                        [queryset.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+                if row and row[0] >= settings.ADMIN_ESTIMATED_COUNT_FROM:
+                    return int(row[0])
+        return super().count
@@ -0,0 +1,84 @@
+import cProfile
+import os
+import re
+import time
+
+from django.conf import settings
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+SPEEDSCOPE_SUFFIX = '.speedscope.json'
+CPROFILE_SUFFIX = '.prof'
+UNSAFE_CHARS = re.compile(r'[^\w-]+', re.ASCII)
+
+
+class RequestProfiler:
+    """Профилировщик одного запроса: pyinstrument или cProfile.
+
+    pyinstrument сохраняет дерево вызовов в формате speedscope,
+    без него пишется .prof для pstats, snakeviz или flameprof.
+    """
+
+    def __init__(self):
+        if Profiler is not None:
+            self.profiler = Profiler(
+                interval=settings.PROFILING_INTERVAL, async_mode='disabled')
+            self.suffix = SPEEDSCOPE_SUFFIX
+        else:
+            self.profiler = cProfile.Profile()
+            self.suffix = CPROFILE_SUFFIX
+
+    def start(self):
+        if Profiler is not None:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        if Profiler is not None:
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    def save(self, request, request_id, duration):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        path_slug = UNSAFE_CHARS.sub('_', request.path).strip('_')[:60]
+        name = (f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-'
+                f'{path_slug or "root"}-{int(duration * 1000)}ms-'
+                f'{request_id}{self.suffix}')
+        path = os.path.join(settings.PROFILING_DIR, name)
+        if Profiler is not None:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(self.profiler.output(SpeedscopeRenderer()))
+        else:
+            self.profiler.dump_stats(path)
+        return name
+
+
+def profile_files():
+    """Сохранённые профили, новые первыми."""
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    entries = [
+        entry for entry in os.scandir(settings.PROFILING_DIR)
+        if entry.is_file() and entry.name.endswith(
+            (SPEEDSCOPE_SUFFIX, CPROFILE_SUFFIX))
+    ]
+    return sorted(entries, key=lambda entry: entry.stat().st_mtime,
+                  reverse=True)
+
+
+def prune_profiles(keep):
+    """Удаляет самые старые профили сверх keep; сколько удалено."""
+    stale = profile_files()[keep:]
+    for entry in stale:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            # Удалён другим процессом.
+            pass
+    return len(stale)
@@ -0,0 +1,48 @@
+from django.db import connections, router
+
+
+def _columns(connection, model, values):
+    """Имена столбцов и подготовленные значения полей модели."""
+    columns, params = [], []
+    for name, value in values.items():
+        field = model._meta.get_field(name)
+        columns.append(connection.ops.quote_name(field.column))
+        params.append(field.get_db_prep_save(value, connection))
+    return columns, params
+
+
+def insert_ignore(model, **values):
+    """Вставка строки, если её ещё нет; число вставленных строк.
+
+    Один запрос INSERT ... ON CONFLICT DO NOTHING вместо exists()
+    и create(): параллельные запросы не получают IntegrityError.
+    """
+    connection = connections[router.db_for_write(model)]
+    columns, params = _columns(connection, model, values)
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(columns))
+    if connection.vendor == 'mysql':
+        sql = (f'INSERT IGNORE INTO {table} ({", ".join(columns)}) '
+               f'VALUES ({placeholders})')
+    else:
+        sql = (f'INSERT INTO {table} ({", ".join(columns)}) '
+               f'VALUES ({placeholders}) ON CONFLICT DO NOTHING')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def delete_rows(model, **values):
+    """Удаление строк по равенству полей одним DELETE; число удалённых.
+
+    В отличие от QuerySet.delete() не выбирает строки заранее и не
+    отправляет сигналы, поэтому подходит только для моделей без
+    зависимых таблиц.
+    """
+    connection = connections[router.db_for_write(model)]
+    columns, params = _columns(connection, model, values)
+    table = connection.ops.quote_name(model._meta.db_table)
+    where = ' AND '.join(f'{column} = %s' for column in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {where}', params)
+        return cursor.rowcount
@@ -10,7 +10,7 @@ load_dotenv(os.path.join(BASE_DIR.parent.parent, 'infra/.env'), verbose=True)
 
 SECRET_KEY = os.getenv('SECRET_KEY', default=get_random_secret_key())
 
-DEBUG = os.getenv('DEBUG', default=False)
+DEBUG = os.getenv('DEBUG', default='False') == 'True'
 
 ALLOWED_HOSTS = ['*']
 
@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'recipes.apps.RecipesConfig',
     'api.apps.ApiConfig',
+    'outbox.apps.OutboxConfig',
     'rest_framework',
     'django_filters',
     'rest_framework.authtoken',
@@ -32,15 +33,39 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'logger.middleware.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'foodgram.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'foodgram.middleware.ProfilingMiddleware',
 ]
 
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', default='False') == 'True'
+PROFILING_SAMPLE_RATE = float(
+    os.getenv('PROFILING_SAMPLE_RATE', default=0))
+PROFILING_INTERVAL = 0.001
+PROFILING_DIR = os.getenv(
+    'PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', default=1000))
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', default=1024))
+COMPRESSION_CONTENT_TYPES = (
+    'application/json',
+    'application/javascript',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/javascript',
+    'text/plain',
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -73,6 +98,40 @@ DATABASES = {
     }
 }
 
+if os.getenv('REPLICA_DB_HOST') or os.getenv('REPLICA_DB_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv(
+            'REPLICA_DB_NAME', default=DATABASES['default']['NAME']),
+        'HOST': os.getenv(
+            'REPLICA_DB_HOST', default=DATABASES['default']['HOST']),
+        'PORT': os.getenv(
+            'REPLICA_DB_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.db_routers.PrimaryReplicaRouter']
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=5))
+
+# Redis, если задан его адрес (docker-compose), иначе кэш в памяти
+# процесса для локального запуска.
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', default='')
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default=('django_redis.cache.RedisCache'
+                     if CACHE_LOCATION.startswith('redis')
+                     else 'django.core.cache.backends.locmem.LocMemCache')),
+        'LOCATION': CACHE_LOCATION,
+    }
+}
+# Кэш, общий для всех процессов и с атомарным incr.
+CACHE_SHARED = CACHES['default']['BACKEND'].startswith((
+    'django_redis.', 'django.core.cache.backends.redis.',
+    'django.core.cache.backends.memcached.'))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -101,11 +160,25 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'foodgram.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+MAX_UPLOAD_IMAGE_BYTES = int(
+    os.getenv('MAX_UPLOAD_IMAGE_BYTES', default=10 * 1024 * 1024))
+MAX_UPLOAD_IMAGE_SIDE = int(os.getenv('MAX_UPLOAD_IMAGE_SIDE', default=8000))
+MAX_UPLOAD_IMAGE_PIXELS = int(
+    os.getenv('MAX_UPLOAD_IMAGE_PIXELS', default=40_000_000))
+
 AUTH_USER_MODEL = 'users.User'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -115,19 +188,49 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon_read': os.getenv('THROTTLE_ANON_READ', default='120/min'),
+        'user_read': os.getenv('THROTTLE_USER_READ', default='600/min'),
+        'user_write': os.getenv('THROTTLE_USER_WRITE', default='60/min'),
+        'export': os.getenv('THROTTLE_EXPORT', default='10/hour'),
+        'auth': os.getenv('THROTTLE_AUTH', default='20/min'),
+    },
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
 }
 
+THROTTLE_SHARED = os.getenv(
+    'THROTTLE_SHARED', default=str(CACHE_SHARED)) == 'True'
+THROTTLE_LOCAL_SIZE = 100000
+THROTTLE_SYNC_BATCH = int(os.getenv('THROTTLE_SYNC_BATCH', default=20))
+THROTTLE_SYNC_SECONDS = float(os.getenv('THROTTLE_SYNC_SECONDS', default=1))
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default=10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', default=60))
+TOKEN_CACHE_SHARED = os.getenv(
+    'TOKEN_CACHE_SHARED', default=str(CACHE_SHARED)) == 'True'
+
 DJOSER = {
     'HIDE_USERS': False,
+    'SERIALIZERS': {
+        'user': 'api.serializers.UserProfileSerializer',
+        'current_user': 'api.serializers.UserProfileSerializer',
+    },
     'PERMISSIONS': {
         'user_list': ['rest_framework.permissions.AllowAny'],
         'password_reset': ['rest_framework.permissions.AllowAny'],
@@ -141,6 +244,72 @@ DJOSER = {
 }
 
 
+LOG_LEVEL = os.getenv('LOG_LEVEL', default='INFO')
+# LOG_LEVELS=api=DEBUG,django.db.backends=WARNING
+LOG_LEVELS = dict(
+    item.strip().split('=', 1)
+    for item in os.getenv('LOG_LEVELS', default='').split(',')
+    if '=' in item
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_id': {'()': 'logger.filters.RequestIdFilter'},
+        'sampling': {
+            '()': 'logger.filters.SamplingFilter',
+            'burst': int(os.getenv('LOG_SAMPLING_BURST', default=10)),
+            'period': int(os.getenv('LOG_SAMPLING_PERIOD', default=60)),
+        },
+    },
+    'formatters': {
+        'json': {'()': 'logger.formatters.JSONFormatter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'logger.handlers.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
+            'filters': ['request_id', 'sampling'],
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {'handlers': [], 'level': LOG_LEVEL},
+        **{
+            name.strip(): {'level': level.strip().upper()}
+            for name, level in LOG_LEVELS.items()
+        },
+    },
+}
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', default=5))
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', default=10))
+OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', default=300))
+
+IMAGE_DELETE_DELAY = 600
+
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.getenv('FEED_FANOUT_MAX_FOLLOWERS', default=1000))
+FEED_BACKFILL_SIZE = 100
+
+# Журнал событий избранного и покупок: пачка, период записи в секундах,
+# предел событий в памяти процесса и срок хранения сырых событий.
+ACTIVITY_BATCH_SIZE = 500
+ACTIVITY_FLUSH_SECONDS = int(os.getenv('ACTIVITY_FLUSH_SECONDS', default=5))
+ACTIVITY_BUFFER_MAX = int(os.getenv('ACTIVITY_BUFFER_MAX', default=10000))
+ACTIVITY_RETAIN_MONTHS = int(
+    os.getenv('ACTIVITY_RETAIN_MONTHS', default=3))
+
+ADMIN_ESTIMATED_COUNT_FROM = 10000
+
 LENGTH_FIELDS_RECIPES = 200
 LENGTH_FIELDS_USER = 150
 LENGTH_FIELDS_COLOR = 7
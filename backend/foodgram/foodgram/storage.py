@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from foodgram.compression import COMPRESSIBLE_SUFFIXES, compress_file
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем содержимого в имени и сжатыми копиями .gz/.br.
+
+    Имена меняются только при изменении файла, поэтому nginx отдаёт их
+    с бессрочным кэшированием. Копии создаются после всех проходов
+    хэширования и только для изменившихся файлов.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_SUFFIXES):
+                compress_file(self.path(name), settings.COMPRESSION_MIN_SIZE)
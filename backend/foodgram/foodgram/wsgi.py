@@ -1,3 +1,4 @@
+import gc
 import os
 
 from django.core.wsgi import get_wsgi_application
@@ -5,3 +6,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
 
 application = get_wsgi_application()
+
+# С gunicorn --preload URLconf, представления и сериализаторы
+# импортируются один раз в мастер-процессе, а gc.freeze() убирает
+# загруженные объекты из обхода сборщика мусора, чтобы воркеры не
+# копировали общие страницы памяти при сборке.
+from django.urls import get_resolver  # noqa: E402
+
+get_resolver().url_patterns
+gc.freeze()
@@ -0,0 +1,37 @@
+"""Настройки gunicorn из переменных окружения (.env).
+
+gunicorn читает ./gunicorn.conf.py из рабочего каталога сам.
+
+Код приложения проверен на работу в потоках (gthread): кэш токенов,
+корзины ограничений частоты и выборка логов защищены блокировками,
+id запроса и выбор реплики хранятся в ContextVar, обработчик логов
+пишет через потокобезопасную очередь, профилировщик пропускает
+параллельные запросы. У каждого потока своё соединение с базой, поэтому
+в Postgres нужно max_connections не меньше workers * threads на каждый
+контейнер плюс воркер outbox.
+"""
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    return int(os.getenv(name) or default)
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() + 1)
+# Для sync потоки не используются, gunicorn сам переключает класс на
+# gthread при threads > 1.
+threads = env_int('GUNICORN_THREADS',
+                  4 if worker_class == 'gthread' else 1)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+# Перезапуск воркеров после N запросов ограничивает рост памяти,
+# разброс не даёт всем воркерам перезапуститься одновременно.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+# Файл heartbeat воркеров в памяти, а не на overlay-диске контейнера.
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
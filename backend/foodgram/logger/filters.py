@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+request_id = ContextVar('request_id', default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись id текущего запроса.
+
+    django.request пишет лог уже после выхода из middleware, для него
+    id берётся из переданного в запись запроса.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id.get() or getattr(
+            getattr(record, 'request', None), 'request_id', None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Ограничение частоты одинаковых сообщений.
+
+    Сообщения уровня level и выше с одним шаблоном от одного логгера
+    проходят не чаще burst раз за period секунд, остальные
+    отбрасываются; сообщения ниже level не ограничиваются. Число
+    отброшенных попадает в поле suppressed следующей записи. Раз за
+    period окна, которые уже закончились, удаляются вместе с
+    неотправленными счётчиками.
+    """
+
+    def __init__(self, burst=10, period=60, level=logging.ERROR):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.level = level
+        self._windows = {}
+        self._swept = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level or self.burst <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept >= self.period:
+                self.sweep(now)
+            started, passed, suppressed = self._windows.get(
+                key, (now, 0, 0))
+            if now - started >= self.period:
+                started, passed = now, 0
+            if passed >= self.burst:
+                self._windows[key] = (started, passed, suppressed + 1)
+                return False
+            self._windows[key] = (started, passed + 1, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+    def sweep(self, now):
+        self._windows = {
+            key: window for key, window in self._windows.items()
+            if now - window[0] < self.period
+        }
+        self._swept = now
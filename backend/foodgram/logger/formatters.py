@@ -0,0 +1,33 @@
+import json
+import logging
+from datetime import datetime, timezone
+
+RESERVED_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {
+    'message', 'asctime', 'request_id', 'request',
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON."""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc_info'] = record.exc_text
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
@@ -0,0 +1,63 @@
+import atexit
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueueListenerHandler(QueueHandler):
+    """Обработчик, отдающий записи в очередь для фонового потока.
+
+    Поток-слушатель запускается при первой записи в каждом процессе,
+    поэтому переживает fork воркеров gunicorn. При переполнении
+    очереди записи отбрасываются, а не блокируют запрос.
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        # Ссылки cfg:// из dictConfig разрешаются только при доступе
+        # по индексу, итерация по списку вернула бы строки.
+        self.target_handlers = [
+            handlers[index] for index in range(len(handlers))]
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.queue.maxsize)
+            self._listener = QueueListener(
+                self.queue, *self.target_handlers,
+                respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.stop)
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+    def prepare(self, record):
+        """Подстановка аргументов без форматирования вывода.
+
+        Форматирование JSON и трассировок выполняет поток-слушатель.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        super().emit(record)
@@ -0,0 +1,31 @@
+import re
+import uuid
+
+from logger.filters import request_id
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+VALID_REQUEST_ID = re.compile(r'^[\w.-]{1,64}$', re.ASCII)
+
+
+class RequestIdMiddleware:
+    """Id запроса из заголовка X-Request-ID или новый uuid.
+
+    Id попадает во все записи лога, сделанные при обработке запроса,
+    и возвращается клиенту в том же заголовке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        value = request.headers.get(REQUEST_ID_HEADER, '')
+        if not VALID_REQUEST_ID.match(value):
+            value = uuid.uuid4().hex
+        request.request_id = value
+        token = request_id.set(value)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id.reset(token)
+        response[REQUEST_ID_HEADER] = value
+        return response
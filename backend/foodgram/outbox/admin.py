@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboxJob
+
+
+@admin.register(OutboxJob)
+class OutboxJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'status', 'attempts', 'run_after',
+                    'created')
+    list_filter = ('status', 'task')
+    readonly_fields = ('created',)
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.update(status=OutboxJob.PENDING, attempts=0,
+                        run_after=timezone.now(), locked_until=None)
@@ -0,0 +1,118 @@
+import json
+import logging
+import random
+import signal
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from outbox.models import OutboxJob
+from outbox.tasks import registry
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 3600
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из таблицы outbox. Можно запускать '
+            'несколько воркеров одновременно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Сколько задач забирать за раз (по умолчанию 2 на поток).')
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, если задач нет.')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        batch_size = options['batch_size'] or options['threads'] * 2
+        with ThreadPoolExecutor(options['threads']) as pool:
+            while not self.stopping:
+                jobs = self.claim(batch_size)
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                list(pool.map(self.run_job, jobs))
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def claim(self, limit):
+        """Захват готовых задач и задач с истёкшей арендой.
+
+        В Postgres строки блокируются с SKIP LOCKED, в остальных базах
+        каждая задача захватывается условным UPDATE.
+        """
+        now = timezone.now()
+        ready = OutboxJob.objects.filter(
+            Q(status=OutboxJob.PENDING, run_after__lte=now)
+            | Q(status=OutboxJob.RUNNING, locked_until__lt=now)
+        ).order_by('run_after')
+        lease = {
+            'status': OutboxJob.RUNNING,
+            'locked_until': now + timedelta(
+                seconds=settings.OUTBOX_LEASE_SECONDS),
+            'attempts': F('attempts') + 1,
+        }
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                ids = list(ready.select_for_update(skip_locked=True)
+                           .values_list('pk', flat=True)[:limit])
+                OutboxJob.objects.filter(pk__in=ids).update(**lease)
+        else:
+            ids = [
+                pk for pk in ready.values_list('pk', flat=True)[:limit]
+                if ready.filter(pk=pk).update(**lease)
+            ]
+        return list(OutboxJob.objects.filter(pk__in=ids))
+
+    def run_job(self, job):
+        try:
+            function = registry.get(job.task)
+            if function is None:
+                raise LookupError(f'Задача {job.task} не зарегистрирована')
+            started = time.perf_counter()
+            function(**json.loads(job.payload))
+        except Exception:
+            self.fail(job, traceback.format_exc())
+        else:
+            OutboxJob.objects.filter(pk=job.pk).delete()
+            logger.info('Задача %s выполнена за %.3f с', job.task,
+                        time.perf_counter() - started)
+        finally:
+            close_old_connections()
+
+    def fail(self, job, error):
+        """Повтор с экспоненциальной задержкой или отметка об ошибке."""
+        if job.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            logger.error('Задача %s #%s не выполнена после %s попыток',
+                         job.task, job.pk, job.attempts)
+            OutboxJob.objects.filter(pk=job.pk).update(
+                status=OutboxJob.FAILED, locked_until=None,
+                last_error=error)
+            return
+        delay = min(settings.OUTBOX_RETRY_DELAY * 2 ** (job.attempts - 1),
+                    MAX_RETRY_DELAY) * random.uniform(0.5, 1.5)
+        logger.warning('Задача %s #%s упала, повтор через %.0f с',
+                       job.task, job.pk, delay)
+        OutboxJob.objects.filter(pk=job.pk).update(
+            status=OutboxJob.PENDING, locked_until=None, last_error=error,
+            run_after=timezone.now() + timedelta(seconds=delay))
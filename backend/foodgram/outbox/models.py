@@ -0,0 +1,63 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxJob(models.Model):
+    """Фоновая задача, записанная в одной транзакции с изменением."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField(
+        max_length=200,
+        verbose_name='Задача',
+    )
+    payload = models.TextField(
+        default='{}',
+        verbose_name='Аргументы',
+        help_text='Аргументы задачи в JSON',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Не раньше',
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Занята до',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана',
+    )
+
+    class Meta:
+        ordering = ('run_after',)
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=('status', 'run_after'),
+                         name='outbox_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,51 @@
+import json
+from datetime import timedelta
+from functools import partial
+
+from django.utils import timezone
+
+from outbox.models import OutboxJob
+
+registry = {}
+
+
+def enqueue(task_name, countdown=0, **kwargs):
+    """Постановка задачи в очередь.
+
+    Вызывается внутри транзакции изменения: задача появится только
+    вместе с ним и не потеряется при падении процесса.
+    """
+    if task_name not in registry:
+        raise KeyError(f'Задача {task_name} не зарегистрирована')
+    return OutboxJob.objects.create(
+        task=task_name,
+        payload=json.dumps(kwargs),
+        run_after=timezone.now() + timedelta(seconds=countdown),
+    )
+
+
+def enqueue_many(task_name, kwargs_list, countdown=0, batch_size=1000):
+    """Постановка пачки задач одного типа без запроса на каждую."""
+    if task_name not in registry:
+        raise KeyError(f'Задача {task_name} не зарегистрирована')
+    run_after = timezone.now() + timedelta(seconds=countdown)
+    return OutboxJob.objects.bulk_create(
+        [OutboxJob(task=task_name, payload=json.dumps(kwargs),
+                   run_after=run_after) for kwargs in kwargs_list],
+        batch_size=batch_size)
+
+
+def task(function=None, name=None):
+    """Регистрация функции как фоновой задачи.
+
+    Аргументы задачи должны сериализоваться в JSON. Задача может
+    выполниться больше одного раза и должна быть идемпотентной.
+    """
+    if function is None:
+        return partial(task, name=name)
+    task_name = name or f'{function.__module__}.{function.__name__}'
+    registry[task_name] = function
+    function.task_name = task_name
+    function.enqueue = partial(enqueue, task_name)
+    function.enqueue_many = partial(enqueue_many, task_name)
+    return function
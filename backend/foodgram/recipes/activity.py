@@ -0,0 +1,192 @@
+import atexit
+import logging
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from recipes.models import ActivityEvent, Favorite, ShoppingCart
+
+logger = logging.getLogger(__name__)
+
+KINDS = {
+    (Favorite, True): ActivityEvent.FAVORITE_ADDED,
+    (Favorite, False): ActivityEvent.FAVORITE_REMOVED,
+    (ShoppingCart, True): ActivityEvent.CART_ADDED,
+    (ShoppingCart, False): ActivityEvent.CART_REMOVED,
+}
+TABLE = ActivityEvent._meta.db_table
+PARTITION_NAME = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+class ActivityBuffer:
+    """События в памяти процесса, которые фоновый поток пишет пачками.
+
+    Запрос только добавляет событие в список, поток сохраняет список
+    одним bulk_create раз в interval секунд или при наборе пачки.
+    Поток запускается при первом событии в каждом процессе, поэтому
+    переживает fork воркеров gunicorn. Если база недоступна и список
+    дорос до max_size, новые события отбрасываются, а не копятся.
+    """
+
+    def __init__(self, batch_size, interval, max_size):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_size = max_size
+        self.events = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    def start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.events = []
+            self._wakeup = threading.Event()
+            threading.Thread(target=self.run, name='activity-flush',
+                             daemon=True).start()
+            self._pid = os.getpid()
+            atexit.register(self.flush)
+
+    def add(self, event):
+        if self._pid != os.getpid():
+            self.start()
+        with self._lock:
+            if len(self.events) >= self.max_size:
+                self.dropped += 1
+                return
+            self.events.append(event)
+            full = len(self.events) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Запись накопленных событий; число записанных."""
+        with self._lock:
+            events, self.events = self.events, []
+        if not events:
+            return 0
+        try:
+            ActivityEvent.objects.bulk_create(
+                events, batch_size=self.batch_size)
+        except DatabaseError:
+            logger.exception('Не удалось записать %s событий', len(events))
+            # Повтор при следующей записи, сколько поместится.
+            with self._lock:
+                room = max(self.max_size - len(self.events), 0)
+                self.dropped += max(len(events) - room, 0)
+                self.events[:0] = events[:room]
+            return 0
+        return len(events)
+
+
+buffer = ActivityBuffer(settings.ACTIVITY_BATCH_SIZE,
+                        settings.ACTIVITY_FLUSH_SECONDS,
+                        settings.ACTIVITY_BUFFER_MAX)
+
+
+def record(model, user_id, recipe_id, added):
+    """Добавление или удаление рецепта в избранном или списке покупок."""
+    buffer.add(ActivityEvent(
+        created=timezone.now(), kind=KINDS[model, added],
+        recipe_id=recipe_id, user_id=user_id))
+
+
+def add_months(day, months):
+    """Первое число месяца, отстоящего от day на months месяцев."""
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1,
+                       day=1)
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table '
+                       'WHERE partrelid = %s::regclass', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def create_partitions(connection, start, months):
+    """Секции событий на months месяцев, начиная с месяца start.
+
+    Секции нужно создавать заранее: события месяца без секции попадают
+    в секцию по умолчанию. Если так уже случилось, секция создаётся
+    отдельной таблицей, события месяца переносятся в неё из секции по
+    умолчанию и она подключается к таблице событий.
+    """
+    quote = connection.ops.quote_name
+    default = quote(f'{TABLE}_default')
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months):
+            month = add_months(start, offset)
+            name = f'{TABLE}_y{month:%Y}m{month:%m}'
+            bounds = (f"FROM ('{month.isoformat()}') "
+                      f"TO ('{add_months(month, 1).isoformat()}')")
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            with transaction.atomic(using=connection.alias):
+                # Новые события месяца ждут, пока секция не подключена.
+                cursor.execute(f'LOCK TABLE {default} IN EXCLUSIVE MODE')
+                cursor.execute(
+                    f'SELECT 1 FROM {default} WHERE created >= %s '
+                    f'AND created < %s LIMIT 1',
+                    [month, add_months(month, 1)])
+                if cursor.fetchone() is None:
+                    cursor.execute(
+                        f'CREATE TABLE {quote(name)} PARTITION OF '
+                        f'{quote(TABLE)} FOR VALUES {bounds}')
+                else:
+                    logger.warning('События за %s в секции по умолчанию '
+                                   'переносятся в %s', month, name)
+                    cursor.execute(
+                        f'CREATE TABLE {quote(name)} '
+                        f'(LIKE {quote(TABLE)} INCLUDING DEFAULTS)')
+                    cursor.execute(
+                        f'WITH moved AS (DELETE FROM {default} '
+                        f'WHERE created >= %s AND created < %s '
+                        f'RETURNING *) '
+                        f'INSERT INTO {quote(name)} SELECT * FROM moved',
+                        [month, add_months(month, 1)])
+                    cursor.execute(
+                        f'ALTER TABLE {quote(TABLE)} ATTACH PARTITION '
+                        f'{quote(name)} FOR VALUES {bounds}')
+            created.append(name)
+    return created
+
+
+def drop_partitions(connection, before):
+    """Удаление целиком секций месяцев раньше before; их имена."""
+    quote = connection.ops.quote_name
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT inhrelid::regclass::text FROM pg_inherits '
+                       'WHERE inhparent = %s::regclass', [TABLE])
+        names = [name.strip('"') for name, in cursor.fetchall()]
+        for name in names:
+            found = PARTITION_NAME.match(name)
+            if found is None:
+                continue
+            year, month = map(int, found.groups())
+            if (year, month) < (before.year, before.month):
+                cursor.execute(f'DROP TABLE {quote(name)}')
+                dropped.append(name)
+    return dropped
@@ -1,11 +1,17 @@
 from django.contrib import admin
+from django.db.models import OuterRef, Subquery
 
-from .models import Ingredient, Recipes, Tag, RecipeIngredient
+from foodgram.paginators import EstimatedCountPaginator
+
+from .models import (ActivityDaily, Ingredient, MeasurementUnit, Recipes,
+                     RecipeIngredient, Tag)
+from .units import normalize_ingredients
 
 
 class IngredientInline(admin.TabularInline):
     model = RecipeIngredient
     min_num = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipes)
@@ -14,14 +20,17 @@ class RecipeAdmin(admin.ModelAdmin):
         'pk',
         'name',
         'author',
+        'favorites_count',
     )
-    list_filter = (
-        'author',
-        'name',
-        'tags',
-    )
+    list_select_related = ('author',)
+    list_filter = ('tags',)
+    search_fields = ('name', 'author__username', 'author__email')
+    autocomplete_fields = ('author',)
+    readonly_fields = ('favorites_count',)
     inlines = [IngredientInline]
     empty_value_display = ('-пусто-')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Ingredient)
@@ -30,10 +39,74 @@ class IngredientAdmin(admin.ModelAdmin):
         'pk',
         'name',
         'measurement_unit',
+        'base_unit',
+        'unit_factor',
     )
-    search_fields = ('name',)
-    list_filter = ('measurement_unit',)
+    search_fields = ('^name',)
     empty_value_display = ('-пусто-')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(MeasurementUnit)
+class MeasurementUnitAdmin(admin.ModelAdmin):
+    list_display = ('name', 'base_unit', 'factor')
+    list_editable = ('base_unit', 'factor')
+    search_fields = ('name', 'base_unit')
+
+    def save_model(self, request, obj, form, change):
+        """Пересчёт сохранённых у ингредиентов единиц."""
+        super().save_model(request, obj, form, change)
+        normalize_ingredients(
+            Ingredient.objects.filter(measurement_unit=obj.name))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        normalize_ingredients(
+            Ingredient.objects.filter(measurement_unit=obj.name))
+
+    def delete_queryset(self, request, queryset):
+        names = list(queryset.values_list('name', flat=True))
+        super().delete_queryset(request, queryset)
+        normalize_ingredients(
+            Ingredient.objects.filter(measurement_unit__in=names))
+
+
+@admin.register(ActivityDaily)
+class ActivityDailyAdmin(admin.ModelAdmin):
+    """Отчёт по дням из счётчиков compact_activity, только чтение.
+
+    Счётчики удалённых рецептов остаются (ключ без ограничения в базе),
+    поэтому название берётся подзапросом, а не INNER JOIN через
+    select_related, который скрыл бы такие строки.
+    """
+    list_display = (
+        'date',
+        'recipe_title',
+        'favorites_added',
+        'favorites_removed',
+        'cart_added',
+        'cart_removed',
+    )
+    date_hierarchy = 'date'
+    search_fields = ('recipe__name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipe_name=Subquery(Recipes.objects.filter(
+                pk=OuterRef('recipe_id')).values('name')[:1]))
+
+    def recipe_title(self, obj):
+        return obj.recipe_name or f'Удалён (id {obj.recipe_id})'
+    recipe_title.short_description = 'Рецепт'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 admin.site.register(Tag)
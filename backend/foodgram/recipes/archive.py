@@ -0,0 +1,57 @@
+import io
+import json
+import sys
+import tarfile
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+# Архив: manifest.json, tags.jsonl и пачки recipes/NNNNNN.jsonl, перед
+# каждой пачкой - ещё не выгруженные изображения её рецептов в media/.
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+TAGS = 'tags.jsonl'
+RECIPES_DIR = 'recipes/'
+MEDIA_DIR = 'media/'
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def dump_lines(items):
+    return ''.join(json.dumps(item, ensure_ascii=False) + '\n'
+                   for item in items).encode()
+
+
+def add_bytes(archive, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(data))
+
+
+@contextmanager
+def open_archive(path, mode):
+    """Потоковый tar: '-' - stdin/stdout, сжатие gzip по расширению."""
+    writing = mode == 'w'
+    if path == '-':
+        fileobj = sys.stdout.buffer if writing else sys.stdin.buffer
+        compression = 'gz'
+    else:
+        fileobj = open(path, 'wb' if writing else 'rb')
+        compression = 'gz' if path.endswith(('.gz', '.tgz')) else ''
+    if not writing:
+        compression = '*'
+    try:
+        with tarfile.open(fileobj=fileobj,
+                          mode=f'{mode}|{compression}') as archive:
+            yield archive
+    finally:
+        if path != '-':
+            fileobj.close()
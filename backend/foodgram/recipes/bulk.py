@@ -0,0 +1,31 @@
+import csv
+import io
+
+from django.db import connection
+
+
+def write_rows(model, fields, rows, batch_size):
+    """Запись строк: COPY в Postgres, bulk_create в остальных базах."""
+    if not rows:
+        return
+    if connection.vendor == 'postgresql':
+        columns = [model._meta.get_field(field).column for field in fields]
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {model._meta.db_table} ({", ".join(columns)}) '
+                f'FROM STDIN WITH (FORMAT csv)', buffer)
+        return
+    model.objects.bulk_create(
+        [model(**dict(zip(fields, row))) for row in rows],
+        batch_size=batch_size)
+    # bulk_create подставляет текущее время в поля auto_now_add.
+    auto_now_fields = [
+        field for field in fields
+        if getattr(model._meta.get_field(field), 'auto_now_add', False)]
+    if auto_now_fields:
+        model.objects.bulk_update(
+            [model(**dict(zip(fields, row))) for row in rows],
+            auto_now_fields, batch_size=batch_size)
@@ -0,0 +1,174 @@
+import heapq
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Count, Q
+
+from recipes.archive import chunked
+from recipes.models import FeedEntry, Recipes
+from users.models import Subscription
+
+User = get_user_model()
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def published_before(cursor, date_field='pub_date', id_field='id'):
+    """Условие «раньше курсора» для порядка (-pub_date, -id)."""
+    if cursor is None:
+        return Q()
+    pub_date, pk = cursor
+    return (Q(**{f'{date_field}__lt': pub_date})
+            | Q(**{date_field: pub_date, f'{id_field}__lt': pk}))
+
+
+def recent_recipes(author):
+    return list(Recipes.objects.filter(author=author).order_by(
+        '-pub_date', '-id').values_list('id', 'pub_date')[
+        :settings.FEED_BACKFILL_SIZE])
+
+
+def fill(author, user_ids):
+    """Последние рецепты автора в ленты читателей user_ids."""
+    recent = recent_recipes(author)
+    entries = (
+        FeedEntry(user_id=user_id, recipe_id=recipe_id,
+                  author_id=author.pk, pub_date=pub_date)
+        for user_id in user_ids for recipe_id, pub_date in recent
+    )
+    created = 0
+    for batch in chunked(entries, FANOUT_BATCH_SIZE):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
+def switch_to_pull(author):
+    """Перевод популярного автора на сборку ленты при чтении."""
+    User.objects.filter(pk=author.pk).update(feed_fanout=False)
+    author.feed_fanout = False
+    FeedEntry.objects.filter(author=author).delete()
+
+
+def switch_to_push(author):
+    """Возврат автора к рассылке, когда подписчиков стало мало.
+
+    Порог возврата вдвое ниже порога перевода, чтобы автор около
+    границы не переключался туда и обратно.
+    """
+    User.objects.filter(pk=author.pk).update(feed_fanout=True)
+    author.feed_fanout = True
+    return fill(author, list(Subscription.objects.filter(
+        author=author).values_list('user_id', flat=True)))
+
+
+def rebalance(author, followers):
+    """Режим ленты автора по числу подписчиков и заполнение лент.
+
+    Нужен для подписок, появившихся в обход API: до появления лент,
+    из generate_data. Возвращает число вставленных записей, включая
+    уже существовавшие.
+    """
+    if followers > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        if author.feed_fanout:
+            switch_to_pull(author)
+        return 0
+    if not author.feed_fanout:
+        if followers > settings.FEED_FANOUT_MAX_FOLLOWERS // 2:
+            return 0
+    return switch_to_push(author)
+
+
+def rebuild(author_ids=None):
+    """rebalance для авторов с подписчиками; (авторов, записей).
+
+    Без author_ids - для всех авторов.
+    """
+    authors = User.objects.all()
+    if author_ids is not None:
+        authors = authors.filter(pk__in=author_ids)
+    authors = list(authors.annotate(
+        followers=Count('following')).filter(followers__gt=0).only(
+        'id', 'feed_fanout'))
+    entries = sum(rebalance(author, author.followers) for author in authors)
+    return len(authors), entries
+
+
+def fan_out(recipe):
+    """Копирование рецепта в ленты подписчиков автора."""
+    author = recipe.author
+    followers = Subscription.objects.filter(author=author)
+    if not author.feed_fanout:
+        if (followers.count()
+                <= settings.FEED_FANOUT_MAX_FOLLOWERS // 2):
+            switch_to_push(author)
+        return 0
+    if followers.count() > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        switch_to_pull(author)
+        return 0
+    entries = [
+        FeedEntry(user_id=user_id, recipe_id=recipe.pk,
+                  author_id=author.pk, pub_date=recipe.pub_date)
+        for user_id in followers.values_list('user_id', flat=True)
+    ]
+    FeedEntry.objects.bulk_create(entries, batch_size=FANOUT_BATCH_SIZE,
+                                  ignore_conflicts=True)
+    return len(entries)
+
+
+def backfill(user, author):
+    """Последние рецепты автора в ленту нового подписчика."""
+    if author.feed_fanout:
+        fill(author, [user.pk])
+
+
+def remove_author(user, author):
+    FeedEntry.objects.filter(user=user, author=author).delete()
+
+
+def pulled_streams(author_ids, cursor, size):
+    """Рецепты популярных авторов, по size с каждого индекса автора.
+
+    В Postgres ветки по авторам объединяются одним UNION ALL, каждая
+    читает не больше size строк индекса (author, -pub_date). Базы без
+    LIMIT в ветках UNION получают один запрос с author_id IN (...).
+    """
+    if not author_ids:
+        return []
+    recipes = Recipes.objects.filter(published_before(cursor)).order_by(
+        '-pub_date', '-id').values_list('pub_date', 'id')
+    if (len(author_ids) == 1 or not connections[recipes.db].features
+            .supports_slicing_ordering_in_compound):
+        return [list(recipes.filter(author_id__in=author_ids)[:size])]
+    branches = [recipes.filter(author_id=author_id)[:size]
+                for author_id in author_ids]
+    return [list(branches[0].union(*branches[1:], all=True)
+                 .order_by('-pub_date', '-id')[:size])]
+
+
+def read(user, limit, cursor=None):
+    """(pub_date, id) рецептов ленты по убыванию даты, до limit + 1.
+
+    Рецепты обычных авторов берутся из FeedEntry, популярных - из
+    индекса (author, -pub_date); потоки сливаются по дате.
+    """
+    size = limit + 1
+    pushed = FeedEntry.objects.filter(
+        published_before(cursor, id_field='recipe_id'), user=user,
+    ).order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id')[:size]
+    pull_authors = Subscription.objects.filter(
+        user=user, author__feed_fanout=False).values_list(
+        'author_id', flat=True)
+    streams = [list(pushed)]
+    streams.extend(pulled_streams(list(pull_authors), cursor, size))
+    entries, seen = [], set()
+    for pub_date, pk in heapq.merge(*streams, reverse=True):
+        if pk in seen:
+            continue
+        seen.add(pk)
+        entries.append((pub_date, pk))
+        if len(entries) == size:
+            break
+    return entries
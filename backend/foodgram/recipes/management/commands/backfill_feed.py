@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes import feed
+
+
+class Command(BaseCommand):
+    help = ('Заполняет ленты подписчиков (FeedEntry) по текущим подпискам '
+            'и последним рецептам авторов и переключает авторов между '
+            'рассылкой и сборкой ленты при чтении по числу подписчиков. '
+            'Нужна после первого развёртывания лент и после generate_data; '
+            'повторный запуск безопасен.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        authors, entries = feed.rebuild()
+        self.stdout.write(
+            f'Авторов с подписчиками: {authors}, записей лент: {entries}, '
+            f'{time.perf_counter() - started:.1f} с')
@@ -0,0 +1,130 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.bulk import write_rows
+from recipes.models import SimilarRecipe
+from recipes.similarity import (build_matrix, chunk_size_for,
+                                similarity_block, top_k)
+
+
+class Command(BaseCommand):
+    help = ('Рассчитывает похожие рецепты по косинусному сходству '
+            'ингредиентов и тегов и сохраняет лучшие для каждого рецепта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=10)
+        parser.add_argument(
+            '--tag-weight', type=float, default=0.2,
+            help='Доля сходства по тегам в итоговой оценке (0..1).')
+        parser.add_argument('--min-score', type=float, default=0.05)
+        parser.add_argument(
+            '--memory-mb', type=int, default=256,
+            help='Ограничение памяти на один блок сходств.')
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Считать только рецепты без похожих и добавлять их в '
+                 'списки уже рассчитанных рецептов.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        self.top_k = options['top_k']
+        self.min_score = options['min_score']
+        self.batch_size = options['batch_size']
+        self.recipe_ids, matrix = build_matrix(options['tag_weight'])
+        count = len(self.recipe_ids)
+        self.stdout.write(
+            f'Матрица {count} x {matrix.shape[1]}, {matrix.nnz} ненулевых '
+            f'({time.perf_counter() - started:.1f} с)')
+        if options['incremental']:
+            targets = np.flatnonzero(~np.isin(
+                self.recipe_ids, self.stored_recipe_ids()))
+            self.thresholds = self.current_thresholds()
+            self.thresholds[targets] = np.inf
+        else:
+            targets = np.arange(count)
+            self.thresholds = None
+        chunk = chunk_size_for(count, options['memory_mb'])
+        saved = 0
+        for start in range(0, len(targets), chunk):
+            part = targets[start:start + chunk]
+            block = similarity_block(matrix, part)
+            with transaction.atomic():
+                saved += self.save_block(part, block)
+                if self.thresholds is not None:
+                    saved += self.update_neighbours(part, block)
+            self.stdout.write(
+                f'{min(start + chunk, len(targets))}/{len(targets)} '
+                f'рецептов ({time.perf_counter() - started:.1f} с)')
+        self.stdout.write(f'Сохранено пар: {saved}')
+
+    def stored_recipe_ids(self):
+        return np.fromiter(
+            SimilarRecipe.objects.values_list('recipe_id', flat=True)
+            .distinct().iterator(), dtype=np.int64)
+
+    def current_thresholds(self):
+        """Оценка, которую должен превысить новый рецепт в каждом списке.
+
+        Для неполных списков это min_score, для полных - худшая оценка.
+        """
+        pairs = np.array(
+            list(SimilarRecipe.objects.values_list('recipe_id', 'score')
+                 .iterator()), dtype=np.float64).reshape(-1, 2)
+        position = np.searchsorted(self.recipe_ids,
+                                   pairs[:, 0].astype(np.int64))
+        count = len(self.recipe_ids)
+        lengths = np.bincount(position, minlength=count)[:count]
+        worst = np.full(count, np.inf)
+        np.minimum.at(worst, position, pairs[:, 1])
+        return np.where(lengths >= self.top_k, worst,
+                        self.min_score).astype(np.float32)
+
+    def save_block(self, part, block):
+        ids = self.recipe_ids
+        rows = [
+            (recipe_id, similar_id, score)
+            for recipe_id, (similar, scores) in zip(
+                ids[part].tolist(),
+                top_k(block, self.top_k, self.min_score))
+            for similar_id, score in zip(ids[similar].tolist(),
+                                         scores.tolist())
+        ]
+        SimilarRecipe.objects.filter(
+            recipe_id__in=ids[part].tolist()).delete()
+        write_rows(SimilarRecipe, ('recipe_id', 'similar_id', 'score'), rows,
+                   self.batch_size)
+        return len(rows)
+
+    def update_neighbours(self, part, block):
+        """Добавление новых рецептов в списки уже рассчитанных."""
+        ids = self.recipe_ids
+        columns, rows = np.nonzero(block > self.thresholds)
+        if not len(rows):
+            return 0
+        SimilarRecipe.objects.bulk_create(
+            [SimilarRecipe(recipe_id=int(ids[row]),
+                           similar_id=int(ids[part[column]]),
+                           score=float(block[column, row]))
+             for column, row in zip(columns, rows)],
+            batch_size=self.batch_size, ignore_conflicts=True)
+        affected = np.unique(rows)
+        extra, kept = [], {}
+        for pk, recipe_id, score in SimilarRecipe.objects.filter(
+                recipe_id__in=ids[affected].tolist()).order_by(
+                'recipe_id', '-score').values_list(
+                'pk', 'recipe_id', 'score').iterator():
+            scores = kept.setdefault(recipe_id, [])
+            if len(scores) < self.top_k:
+                scores.append(score)
+            else:
+                extra.append(pk)
+        SimilarRecipe.objects.filter(pk__in=extra).delete()
+        for row in affected:
+            scores = kept.get(int(ids[row]), [])
+            if len(scores) >= self.top_k:
+                self.thresholds[row] = scores[-1]
+        return len(rows) - len(extra)
@@ -0,0 +1,197 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import suppress
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from recipes.archive import chunked
+from recipes.models import Recipes
+from recipes.tasks import delete_unused_image
+
+OK = 'ok'
+MISSING = 'missing'
+CORRUPT = 'corrupt'
+OVERSIZED = 'oversized'
+REENCODED = 'reencoded'
+
+
+def check_image(task):
+    """Проверка файла в отдельном процессе: наличие и полное декодирование.
+
+    Если задано перекодирование, большой JPEG уменьшается во временный
+    файл рядом с исходным; сохраняет его в хранилище основной процесс.
+    """
+    name, path, options = task
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return name, MISSING, 0, None
+    Image.MAX_IMAGE_PIXELS = options['max_pixels']
+    try:
+        with Image.open(path) as image:
+            image.load()
+            image_format = image.format
+            oversized = (max(image.size) > options['max_side']
+                         or size > options['max_bytes'])
+            if image_format != 'JPEG' or not oversized:
+                return name, OK, size, None
+            if not options['reencode']:
+                return name, OVERSIZED, size, None
+            image.thumbnail((options['max_side'], options['max_side']))
+            descriptor, temporary = tempfile.mkstemp(
+                suffix='.jpg', dir=os.path.dirname(path))
+            with os.fdopen(descriptor, 'wb') as output:
+                image.convert('RGB').save(
+                    output, 'JPEG', quality=options['quality'],
+                    optimize=True, progressive=True)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return name, CORRUPT, size, None
+    if os.path.getsize(temporary) >= size:
+        os.remove(temporary)
+        return name, OVERSIZED, size, None
+    return name, REENCODED, size, temporary
+
+
+class Command(BaseCommand):
+    help = ('Проверяет, что изображение каждого рецепта существует и '
+            'декодируется, ищет файлы без рецептов и при необходимости '
+            'уменьшает слишком большие JPEG.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.BASE_DIR, 'check_media.json'),
+            help='Файл прогресса, обновляется после каждой пачки.')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней пачки из файла прогресса.')
+        parser.add_argument(
+            '--reencode', action='store_true',
+            help='Уменьшить JPEG больше --max-side или --max-bytes.')
+        parser.add_argument('--max-side', type=int, default=2048)
+        parser.add_argument('--max-bytes', type=int, default=1024 * 1024)
+        parser.add_argument('--quality', type=int, default=85)
+
+    def handle(self, *args, **options):
+        self.storage = Recipes._meta.get_field('image').storage
+        self.checkpoint = options['checkpoint']
+        state = self.load_state() if options['resume'] else None
+        if state is None:
+            state = {'last_id': 0, 'files': 0, 'bytes': 0, 'seconds': 0,
+                     'problems': {}}
+        else:
+            self.stdout.write(f'Продолжение после рецепта {state["last_id"]}')
+        self.verbosity = options['verbosity']
+        worker_options = {
+            key: options[key]
+            for key in ('reencode', 'max_side', 'max_bytes', 'quality')
+        }
+        worker_options['max_pixels'] = settings.MAX_UPLOAD_IMAGE_PIXELS
+        rows = Recipes.objects.filter(id__gt=state['last_id']).order_by(
+            'id').values_list('id', 'image').iterator(
+            chunk_size=options['chunk_size'])
+        checked = set()
+        pool = Pool(options['workers']) if options['workers'] > 1 else None
+        try:
+            for chunk in chunked(rows, options['chunk_size']):
+                started = time.perf_counter()
+                recipes = {}
+                for recipe_id, image in chunk:
+                    if image and image not in checked:
+                        recipes.setdefault(image, []).append(recipe_id)
+                checked.update(recipes)
+                tasks = [(name, self.storage.path(name), worker_options)
+                         for name in recipes]
+                results = (pool.imap_unordered(check_image, tasks, 16)
+                           if pool else map(check_image, tasks))
+                for name, status, size, temporary in results:
+                    state['files'] += 1
+                    state['bytes'] += size
+                    if status == REENCODED:
+                        self.replace_image(name, temporary)
+                    if status != OK:
+                        state['problems'][name] = status
+                        ids = ', '.join(map(str, recipes[name]))
+                        self.stdout.write(f'{status}: {name} (рецепты {ids})')
+                state['last_id'] = chunk[-1][0]
+                state['seconds'] += time.perf_counter() - started
+                self.save_state(state)
+                self.report(state)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        self.report_orphans()
+        statuses = list(state['problems'].values())
+        self.stdout.write(
+            f'Отсутствуют: {statuses.count(MISSING)}, '
+            f'повреждены: {statuses.count(CORRUPT)}, '
+            f'слишком большие: {statuses.count(OVERSIZED)}, '
+            f'перекодированы: {statuses.count(REENCODED)}')
+        # Если не обработано ни одной пачки, файла прогресса нет.
+        with suppress(FileNotFoundError):
+            os.remove(self.checkpoint)
+
+    def load_state(self):
+        try:
+            with open(self.checkpoint) as checkpoint:
+                return json.load(checkpoint)
+        except FileNotFoundError:
+            return None
+
+    def save_state(self, state):
+        """Атомарная запись прогресса: прерванная запись не портит файл."""
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w') as checkpoint:
+            json.dump(state, checkpoint)
+        os.replace(temporary, self.checkpoint)
+
+    def report(self, state):
+        seconds = max(state['seconds'], 1e-9)
+        self.stdout.write(
+            f'До рецепта {state["last_id"]}: {state["files"]} файлов, '
+            f'{state["bytes"] / 1024 / 1024:.1f} МБ, '
+            f'{state["files"] / seconds:.0f} файлов/с, '
+            f'{state["bytes"] / 1024 / 1024 / seconds:.1f} МБ/с')
+
+    def replace_image(self, name, temporary):
+        """Новое имя по содержимому и перевод на него всех рецептов."""
+        try:
+            with open(temporary, 'rb') as content:
+                new_name = self.storage.save(
+                    os.path.splitext(name)[0] + '.jpg', File(content))
+        finally:
+            os.remove(temporary)
+        with transaction.atomic():
+            Recipes.objects.filter(image=name).update(image=new_name)
+            delete_unused_image.enqueue(
+                countdown=settings.IMAGE_DELETE_DELAY, name=name)
+
+    def report_orphans(self):
+        """Файлы в MEDIA_ROOT, на которые не ссылается ни один рецепт."""
+        referenced = set(
+            Recipes.objects.values_list('image', flat=True).iterator())
+        root = self.storage.location
+        orphans = size = 0
+        for directory, _, files in os.walk(root):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name in referenced:
+                    continue
+                orphans += 1
+                size += os.path.getsize(path)
+                if self.verbosity > 1:
+                    self.stdout.write(f'orphan: {name}')
+        self.stdout.write(
+            f'Файлов без рецептов: {orphans}, {size / 1024 / 1024:.1f} МБ '
+            f'(удаляются командой gc_media)')
@@ -0,0 +1,105 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from recipes.activity import (add_months, create_partitions, drop_partitions,
+                              is_partitioned)
+from recipes.archive import chunked
+from recipes.models import ActivityDaily, ActivityEvent
+
+COUNTERS = {
+    'favorites_added': ActivityEvent.FAVORITE_ADDED,
+    'favorites_removed': ActivityEvent.FAVORITE_REMOVED,
+    'cart_added': ActivityEvent.CART_ADDED,
+    'cart_removed': ActivityEvent.CART_REMOVED,
+}
+
+
+def parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Неверная дата {value}, нужен формат ГГГГ-ММ-ДД')
+
+
+class Command(BaseCommand):
+    help = ('Сворачивает события избранного и покупок в счётчики рецептов '
+            'по дням (ActivityDaily), создаёт секции событий на следующие '
+            'месяцы и удаляет старые. Запускается по cron, например '
+            'раз в час.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since', type=parse_date,
+            help='Пересчитать дни начиная с этой даты (ГГГГ-ММ-ДД). '
+                 'По умолчанию — с последнего свёрнутого дня.')
+        parser.add_argument('--months-ahead', type=int, default=2)
+        parser.add_argument(
+            '--retain-months', type=int,
+            default=settings.ACTIVITY_RETAIN_MONTHS,
+            help='Сколько месяцев хранить сырые события.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_write(ActivityEvent)]
+        partitioned = is_partitioned(connection)
+        this_month = timezone.now().date().replace(day=1)
+        if partitioned:
+            create_partitions(connection, this_month,
+                              options['months_ahead'] + 1)
+        started = time.perf_counter()
+        since = self.compact(options)
+        if since is not None:
+            self.stdout.write(
+                f'Свёрнуты дни с {since}: '
+                f'{time.perf_counter() - started:.1f} с')
+            # Удаляются только уже свёрнутые события.
+            before = min(add_months(this_month, -options['retain_months']),
+                         since.replace(day=1))
+            if partitioned:
+                dropped = drop_partitions(connection, before)
+                self.stdout.write(f'Удалено секций: {len(dropped)}')
+            else:
+                deleted, _ = ActivityEvent.objects.filter(
+                    created__lt=self.start_of(before)).delete()
+                self.stdout.write(f'Удалено событий: {deleted}')
+
+    def start_of(self, day):
+        return timezone.make_aware(
+            datetime.datetime.combine(day, datetime.time.min))
+
+    def compact(self, options):
+        """Пересчёт счётчиков за дни начиная с since; since или None."""
+        first = ActivityEvent.objects.aggregate(Min('created'))[
+            'created__min']
+        if first is None:
+            self.stdout.write('Событий нет.')
+            return None
+        since = options['since'] or ActivityDaily.objects.aggregate(
+            Max('date'))['date__max']
+        # Дни раньше первого события уже удалены, их счётчики не трогаются.
+        first_day = timezone.localdate(first)
+        since = max(since or first_day, first_day)
+        rows = ActivityEvent.objects.filter(
+            created__gte=self.start_of(since)
+        ).annotate(
+            date=TruncDate('created')
+        ).values('recipe_id', 'date').annotate(**{
+            name: Count('id', filter=Q(kind=kind))
+            for name, kind in COUNTERS.items()
+        }).order_by()
+        counters = 0
+        with transaction.atomic():
+            ActivityDaily.objects.filter(date__gte=since).delete()
+            for chunk in chunked(rows.iterator(), options['batch_size']):
+                ActivityDaily.objects.bulk_create(
+                    [ActivityDaily(**row) for row in chunk])
+                counters += len(chunk)
+        self.stdout.write(f'Счётчиков рецептов по дням: {counters}')
+        return since
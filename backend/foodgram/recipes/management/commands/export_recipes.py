@@ -0,0 +1,98 @@
+import json
+import os
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.archive import (FORMAT_VERSION, MANIFEST, MEDIA_DIR, RECIPES_DIR,
+                             TAGS, add_bytes, chunked, dump_lines,
+                             open_archive)
+from recipes.models import RecipeIngredient, Recipes, Tag
+
+FIELDS = ('id', 'name', 'text', 'cooking_time', 'pub_date', 'image',
+          'author__username', 'author__email', 'author__first_name',
+          'author__last_name')
+
+
+class Command(BaseCommand):
+    help = ('Выгружает рецепты с ингредиентами, тегами, авторами и '
+            'изображениями в tar-архив из JSON Lines и медиафайлов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', help='Файл архива (.tar или .tar.gz), "-" - stdout.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-media', action='store_true',
+            help='Не включать изображения, только ссылки на них.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        storage = Recipes._meta.get_field('image').storage
+        # Отчёт в stderr, чтобы не смешивать его с архивом в stdout.
+        log = self.stderr if options['output'] == '-' else self.stdout
+        exported_media = set()
+        recipes = images = missing = 0
+        rows = Recipes.objects.order_by('id').values_list(*FIELDS).iterator(
+            chunk_size=options['chunk_size'])
+        with open_archive(options['output'], 'w') as archive:
+            add_bytes(archive, MANIFEST, json.dumps({
+                'version': FORMAT_VERSION,
+                'created': timezone.now().isoformat(),
+            }).encode())
+            add_bytes(archive, TAGS, dump_lines(
+                Tag.objects.order_by('id').values('name', 'color', 'slug')))
+            for number, chunk in enumerate(
+                    chunked(rows, options['chunk_size']), start=1):
+                records = self.serialize(chunk)
+                for record in records:
+                    image = record['image']
+                    if (options['no_media'] or not image
+                            or image in exported_media):
+                        continue
+                    exported_media.add(image)
+                    path = storage.path(image)
+                    if not os.path.exists(path):
+                        missing += 1
+                        continue
+                    archive.add(path, MEDIA_DIR + image, recursive=False)
+                    images += 1
+                add_bytes(archive, f'{RECIPES_DIR}{number:06d}.jsonl',
+                          dump_lines(records))
+                recipes += len(records)
+                log.write(f'Рецептов: {recipes}, изображений: {images} '
+                          f'({time.perf_counter() - started:.1f} с)')
+        if missing:
+            log.write(f'Изображений не найдено на диске: {missing}')
+
+    def serialize(self, chunk):
+        """Рецепты пачки: два запроса на теги и ингредиенты всей пачки."""
+        ids = [row[0] for row in chunk]
+        tags = defaultdict(list)
+        for recipe_id, slug in Recipes.tags.through.objects.filter(
+                recipes_id__in=ids).values_list('recipes_id', 'tag__slug'):
+            tags[recipe_id].append(slug)
+        ingredients = defaultdict(list)
+        for recipe_id, name, unit, amount in RecipeIngredient.objects.filter(
+                recipe_id__in=ids).order_by('id').values_list(
+                'recipe_id', 'ingredient__name',
+                'ingredient__measurement_unit', 'amount'):
+            ingredients[recipe_id].append([name, unit, amount])
+        return [{
+            'name': name,
+            'text': text,
+            'cooking_time': cooking_time,
+            'pub_date': pub_date.isoformat(),
+            'image': image,
+            'author': {
+                'username': username,
+                'email': email,
+                'first_name': first_name,
+                'last_name': last_name,
+            },
+            'tags': tags[recipe_id],
+            'ingredients': ingredients[recipe_id],
+        } for (recipe_id, name, text, cooking_time, pub_date, image,
+               username, email, first_name, last_name) in chunk]
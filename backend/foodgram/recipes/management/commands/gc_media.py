@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipes
+
+
+class Command(BaseCommand):
+    help = 'Удаляет изображения, на которые не ссылается ни один рецепт.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.')
+        parser.add_argument(
+            '--grace', type=int, default=3600,
+            help='Не трогать файлы моложе указанного числа секунд.')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Проверять весь MEDIA_ROOT, а не только каталог хранилища.')
+
+    def handle(self, *args, **options):
+        storage = Recipes._meta.get_field('image').storage
+        referenced = set(
+            Recipes.objects.values_list('image', flat=True).iterator())
+        root = storage.location
+        start = root if options['all'] else os.path.join(root, storage.prefix)
+        deadline = time.time() - options['grace']
+        removed = freed = 0
+        for directory, _, files in os.walk(start, topdown=False):
+            for file_name in files:
+                path = os.path.join(directory, file_name)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                if name in referenced or os.path.getmtime(path) > deadline:
+                    continue
+                removed += 1
+                freed += os.path.getsize(path)
+                if options['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    os.remove(path)
+            if (not options['dry_run'] and directory != start
+                    and not os.listdir(directory)):
+                os.rmdir(directory)
+        self.stdout.write(
+            f'Неиспользуемых файлов: {removed}, '
+            f'{freed / 1024 / 1024:.1f} МБ '
+            f'{"можно освободить" if options["dry_run"] else "освобождено"}'
+        )
@@ -0,0 +1,255 @@
+import os
+import time
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from multiprocessing import Pool
+from random import Random
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections
+from django.db.models import Count, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from recipes import feed
+from recipes.bulk import write_rows
+from recipes.models import (Favorite, Ingredient, RecipeIngredient, Recipes,
+                            ShoppingCart, Tag)
+from users.models import Subscription
+
+User = get_user_model()
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+WORDS = ('суп', 'салат', 'пирог', 'каша', 'рагу', 'запеканка', 'омлет',
+         'паста', 'плов', 'котлеты', 'блины', 'соус', 'жаркое', 'борщ')
+ADJECTIVES = ('домашний', 'быстрый', 'летний', 'острый', 'нежный',
+              'сытный', 'постный', 'праздничный', 'овощной', 'мясной')
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Егор', 'Нина')
+LAST_NAMES = ('Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов')
+START_DATE = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def zipf_weights(count, exponent):
+    return list(accumulate(1 / rank ** exponent
+                           for rank in range(1, count + 1)))
+
+
+def zipf_choice(rng, items, cum_weights):
+    return items[bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def zipf_sample(rng, items, cum_weights, count):
+    """Выборка без повторов с вероятностями по закону Ципфа."""
+    count = min(count, len(items) // 2)
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(zipf_choice(rng, items, cum_weights))
+    return chosen
+
+
+def generate_recipes(task):
+    """Рецепты с id из [start, end), их ингредиенты и теги."""
+    start, end, params = task
+    rng = Random(f'{params["seed"]}:recipes:{start}')
+    users = params['users']
+    author_weights = zipf_weights(len(users), params['zipf'])
+    ingredients = params['ingredients']
+    ingredient_weights = zipf_weights(len(ingredients), 1.0)
+    tag_through = Recipes.tags.through
+    period = params['period_seconds']
+    recipes, recipe_ingredients, recipe_tags = [], [], []
+    for recipe_id in range(start, end):
+        name = f'{rng.choice(ADJECTIVES)} {rng.choice(WORDS)}'.capitalize()
+        text = ' '.join(rng.choice(WORDS + ADJECTIVES)
+                        for _ in range(rng.randint(20, 120)))
+        recipes.append((
+            recipe_id, zipf_choice(rng, users, author_weights), name,
+            rng.choice(params['images']), text, rng.randint(5, 180),
+            START_DATE + timedelta(seconds=rng.randrange(period)), 0,
+        ))
+        count = max(2, min(20, int(rng.gauss(params['ingredients_mean'],
+                                             3))))
+        for ingredient_id in zipf_sample(rng, ingredients,
+                                         ingredient_weights, count):
+            recipe_ingredients.append(
+                (recipe_id, ingredient_id, rng.randint(1, 500)))
+        for tag_id in rng.sample(params['tags'],
+                                 rng.randint(1, len(params['tags']))):
+            recipe_tags.append((recipe_id, tag_id))
+    batch_size = params['batch_size']
+    write_rows(Recipes, ('id', 'author_id', 'name', 'image', 'text',
+                         'cooking_time', 'pub_date', 'favorites_count'),
+               recipes, batch_size)
+    write_rows(RecipeIngredient, ('recipe_id', 'ingredient_id', 'amount'),
+               recipe_ingredients, batch_size)
+    write_rows(tag_through, ('recipes_id', 'tag_id'), recipe_tags, batch_size)
+    return len(recipes), len(recipe_ingredients)
+
+
+def generate_user_links(task):
+    """Избранное, корзины и подписки пользователей из [start, end)."""
+    start, end, params = task
+    rng = Random(f'{params["seed"]}:links:{start}')
+    recipes = params['recipes']
+    users = params['users']
+    recipe_weights = zipf_weights(len(recipes), params['zipf'])
+    author_weights = zipf_weights(len(users), params['zipf'])
+    favorites, carts, subscriptions = [], [], []
+    for user_id in users[start:end]:
+        for recipe_id in zipf_sample(rng, recipes, recipe_weights, int(
+                rng.expovariate(1 / params['favorites']))):
+            favorites.append((user_id, recipe_id))
+        for recipe_id in zipf_sample(rng, recipes, recipe_weights, int(
+                rng.expovariate(1 / params['carts']))):
+            carts.append((user_id, recipe_id))
+        authors = zipf_sample(rng, users, author_weights, int(
+            rng.expovariate(1 / params['subscriptions'])))
+        subscriptions.extend(
+            (user_id, author) for author in authors if author != user_id)
+    batch_size = params['batch_size']
+    write_rows(Favorite, ('user_id', 'recipe_id'), favorites, batch_size)
+    write_rows(ShoppingCart, ('user_id', 'recipe_id'), carts, batch_size)
+    write_rows(Subscription, ('user_id', 'author_id'), subscriptions,
+               batch_size)
+    return len(favorites), len(carts), len(subscriptions)
+
+
+def run_tasks(function, tasks, workers):
+    if workers == 1:
+        return [function(task) for task in tasks]
+    connections.close_all()
+    with Pool(workers, initializer=connections.close_all) as pool:
+        return pool.map(function, tasks)
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, рецептами, '
+            'избранным, корзинами и подписками для нагрузочных тестов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=float,
+                            default=8)
+        parser.add_argument('--favorites', type=float, default=20,
+                            help='Среднее число избранных на пользователя.')
+        parser.add_argument('--carts', type=float, default=3)
+        parser.add_argument('--subscriptions', type=float, default=10)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель распределения популярности.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--workers', type=int, default=1)
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers > 1 and connection.vendor != 'postgresql':
+            self.stdout.write('Параллельная запись поддерживается только '
+                              'в Postgres, используется один процесс.')
+            workers = 1
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredients:
+            raise CommandError('Сначала выполните load_ingredients.')
+        started = time.perf_counter()
+        params = {
+            'seed': options['seed'],
+            'zipf': options['zipf'],
+            'batch_size': options['batch_size'],
+            'ingredients': ingredients,
+            'ingredients_mean': options['ingredients_per_recipe'],
+            'tags': self.ensure_tags(),
+            'images': self.image_names(),
+            'users': self.create_users(options),
+            'period_seconds': 365 * 24 * 3600,
+            'favorites': options['favorites'],
+            'carts': options['carts'],
+            'subscriptions': options['subscriptions'],
+        }
+        self.report('Пользователи', len(params['users']), started)
+
+        step = time.perf_counter()
+        first_id = (Recipes.objects.aggregate(last=Max('id'))['last']
+                    or 0) + 1
+        chunk = options['chunk_size']
+        tasks = [(start, min(start + chunk, first_id + options['recipes']),
+                  params)
+                 for start in range(first_id, first_id + options['recipes'],
+                                    chunk)]
+        results = run_tasks(generate_recipes, tasks, workers)
+        self.report('Рецепты', sum(result[0] for result in results), step)
+        self.report('Ингредиенты рецептов',
+                    sum(result[1] for result in results), step)
+
+        step = time.perf_counter()
+        params['recipes'] = list(range(first_id,
+                                       first_id + options['recipes']))
+        Random(options['seed']).shuffle(params['recipes'])
+        users_chunk = max(1, chunk // 20)
+        tasks = [(start, start + users_chunk, params)
+                 for start in range(0, len(params['users']), users_chunk)]
+        results = run_tasks(generate_user_links, tasks, workers)
+        for index, label in enumerate(('Избранное', 'Корзины', 'Подписки')):
+            self.report(label, sum(result[index] for result in results),
+                        step)
+
+        self.finish()
+
+        step = time.perf_counter()
+        # COPY минует API, поэтому ленты заполняются отдельно.
+        _, entries = feed.rebuild()
+        self.report('Ленты подписчиков', entries, step)
+        self.report('Всего', None, started)
+
+    def ensure_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS)
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def image_names(self):
+        names = sorted(
+            name for name in os.listdir(settings.MEDIA_ROOT)
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')))
+        return names or ['placeholder.jpg']
+
+    def create_users(self, options):
+        first_id = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        rng = Random(f'{options["seed"]}:users')
+        password = make_password('password')
+        users = [
+            User(id=user_id, username=f'user{user_id}',
+                 email=f'user{user_id}@example.com', password=password,
+                 first_name=rng.choice(FIRST_NAMES),
+                 last_name=rng.choice(LAST_NAMES))
+            for user_id in range(first_id, first_id + options['users'])
+        ]
+        User.objects.bulk_create(users, batch_size=options['batch_size'])
+        return [user.id for user in users]
+
+    def finish(self):
+        """Сброс последовательностей id и пересчёт счётчиков избранного."""
+        models = (User, Recipes, RecipeIngredient, Recipes.tags.through,
+                  Favorite, ShoppingCart, Subscription)
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        counts = Favorite.objects.filter(recipe=OuterRef('pk')).values(
+            'recipe').annotate(total=Count('pk')).values('total')
+        Recipes.objects.update(
+            favorites_count=Coalesce(Subquery(counts), Value(0)))
+
+    def report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        suffix = '' if count is None else f'{count} строк, '
+        self.stdout.write(f'{label}: {suffix}{elapsed:.1f} с')
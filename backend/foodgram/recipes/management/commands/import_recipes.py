@@ -0,0 +1,200 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from recipes import feed
+from recipes.archive import (FORMAT_VERSION, MANIFEST, MEDIA_DIR, RECIPES_DIR,
+                             TAGS, chunked, open_archive)
+from recipes.models import Ingredient, RecipeIngredient, Recipes, Tag
+from recipes.units import normalize_ingredients
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Загружает рецепты из архива export_recipes. Рецепты, которые '
+            'у автора уже есть с тем же названием и датой, пропускаются. '
+            'Ленты подписчиков заполняются в конце, без рассылки каждого '
+            'рецепта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл архива, "-" - stdin.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--skip-missing-authors', action='store_true',
+            help='Пропускать рецепты неизвестных авторов вместо создания '
+                 'пользователей без пароля.')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError('Импорт требует базы, возвращающей id из '
+                               'bulk_create (PostgreSQL, SQLite 3.35+).')
+        started = time.perf_counter()
+        self.options = options
+        self.storage = Recipes._meta.get_field('image').storage
+        # Имя изображения в архиве -> имя в хранилище.
+        self.images = {}
+        self.authors = {}
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+        }
+        self.counts = dict.fromkeys(
+            ('created', 'existing', 'no_author', 'conflict', 'images'), 0)
+        # username из архива -> email, занятый другим пользователем.
+        self.conflicts = {}
+        self.imported_authors = set()
+        with open_archive(options['input'], 'r') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                content = archive.extractfile(member)
+                if member.name == MANIFEST:
+                    self.check_manifest(json.load(content))
+                elif member.name == TAGS:
+                    self.load_tags(content)
+                elif member.name.startswith(MEDIA_DIR):
+                    self.save_image(member.name[len(MEDIA_DIR):], content)
+                elif member.name.startswith(RECIPES_DIR):
+                    for batch in chunked(content, options['batch_size']):
+                        self.import_batch(
+                            [json.loads(line) for line in batch])
+                    self.stdout.write(
+                        f'{member.name}: создано {self.counts["created"]} '
+                        f'({time.perf_counter() - started:.1f} с)')
+        started_feed = time.perf_counter()
+        authors, entries = feed.rebuild(self.imported_authors)
+        self.stdout.write(
+            f'Ленты подписчиков: авторов {authors}, записей {entries} '
+            f'({time.perf_counter() - started_feed:.1f} с)')
+        for username, email in sorted(self.conflicts.items()):
+            self.stderr.write(
+                f'Автор {username} не создан: email {email} занят другим '
+                f'пользователем')
+        self.stdout.write(
+            'Создано рецептов: {created}, уже были: {existing}, '
+            'без автора: {no_author}, конфликт автора: {conflict}, '
+            'изображений: {images}'.format(**self.counts))
+
+    def check_manifest(self, manifest):
+        if manifest.get('version') != FORMAT_VERSION:
+            raise CommandError(
+                f'Неподдерживаемая версия архива: {manifest.get("version")}')
+
+    def load_tags(self, content):
+        Tag.objects.bulk_create(
+            [Tag(**json.loads(line)) for line in content],
+            ignore_conflicts=True)
+        self.tags = dict(Tag.objects.values_list('slug', 'id'))
+
+    def save_image(self, name, content):
+        # Поток tar нельзя перематывать, а хранилище читает файл дважды.
+        self.images[name] = self.storage.save(
+            name, ContentFile(content.read(), name))
+        self.counts['images'] += 1
+
+    def resolve_authors(self, records):
+        authors = {record['author']['username']: record['author']
+                   for record in records
+                   if record['author']['username'] not in self.authors
+                   and record['author']['username'] not in self.conflicts}
+        if not authors:
+            return
+        self.authors.update(User.objects.filter(
+            username__in=authors).values_list('username', 'id'))
+        missing = [author for username, author in authors.items()
+                   if username not in self.authors]
+        if not missing or self.options['skip_missing_authors']:
+            return
+        users = [User(**author) for author in missing]
+        for user in users:
+            user.set_unusable_password()
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        self.authors.update(User.objects.filter(
+            username__in=[author['username'] for author in missing]
+        ).values_list('username', 'id'))
+        # username свободен, поэтому ignore_conflicts пропускает автора
+        # только из-за email, занятого другим пользователем.
+        for author in missing:
+            if author['username'] not in self.authors:
+                self.conflicts[author['username']] = author['email']
+
+    def resolve_ingredients(self, records):
+        missing = {
+            (name, unit) for record in records
+            for name, unit, _ in record['ingredients']
+            if (name, unit) not in self.ingredients
+        }
+        if not missing:
+            return
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=unit)
+             for name, unit in missing], ignore_conflicts=True)
+        created = Ingredient.objects.filter(
+            name__in={name for name, _ in missing}, base_unit='')
+        normalize_ingredients(created)
+        for pk, name, unit in Ingredient.objects.filter(
+                name__in={name for name, _ in missing}).values_list(
+                'id', 'name', 'measurement_unit'):
+            self.ingredients[name, unit] = pk
+
+    def import_batch(self, records):
+        self.resolve_authors(records)
+        self.resolve_ingredients(records)
+        author_ids = {self.authors.get(record['author']['username'])
+                      for record in records}
+        for record in records:
+            record['pub_date'] = parse_datetime(record['pub_date'])
+        existing = set(Recipes.objects.filter(
+            author_id__in=author_ids,
+            name__in={record['name'] for record in records},
+            pub_date__in={record['pub_date'] for record in records},
+        ).values_list('author_id', 'name', 'pub_date'))
+        recipes, new_records = [], []
+        for record in records:
+            username = record['author']['username']
+            author_id = self.authors.get(username)
+            if author_id is None:
+                key = 'conflict' if username in self.conflicts else 'no_author'
+                self.counts[key] += 1
+                continue
+            key = (author_id, record['name'], record['pub_date'])
+            if key in existing:
+                self.counts['existing'] += 1
+                continue
+            existing.add(key)
+            recipes.append(Recipes(
+                author_id=author_id, name=record['name'],
+                text=record['text'], cooking_time=record['cooking_time'],
+                image=self.images.get(record['image'], record['image']),
+                pub_date=record['pub_date'],
+            ))
+            new_records.append(record)
+        if not recipes:
+            return
+        with transaction.atomic():
+            Recipes.objects.bulk_create(recipes)
+            # bulk_create подставляет текущее время в pub_date.
+            for recipe, record in zip(recipes, new_records):
+                recipe.pub_date = record['pub_date']
+            Recipes.objects.bulk_update(recipes, ['pub_date'])
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, amount=amount,
+                                 ingredient_id=self.ingredients[name, unit])
+                for recipe, record in zip(recipes, new_records)
+                for name, unit, amount in record['ingredients']
+            ])
+            Recipes.tags.through.objects.bulk_create([
+                Recipes.tags.through(recipes_id=recipe.pk,
+                                     tag_id=self.tags[slug])
+                for recipe, record in zip(recipes, new_records)
+                for slug in record['tags'] if slug in self.tags
+            ], ignore_conflicts=True)
+        self.imported_authors.update(recipe.author_id for recipe in recipes)
+        self.counts['created'] += len(recipes)
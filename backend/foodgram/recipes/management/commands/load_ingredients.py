@@ -3,16 +3,21 @@ from csv import reader
 from django.core.management.base import BaseCommand
 
 from recipes.models import Ingredient
+from recipes.units import ensure_units, normalize_ingredients
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
     def handle(self, *args, **kwargs):
         with open(
                 'recipes/management/commands/data/ingredients.csv', 'r',
                 encoding='UTF-8'
         ) as ingredients:
-            for row in reader(ingredients):
-                if len(row) == 2:
-                    Ingredient.objects.get_or_create(
-                        name=row[0], measurement_unit=row[1],
-                    )
+            Ingredient.objects.bulk_create(
+                [Ingredient(name=row[0], measurement_unit=row[1])
+                 for row in reader(ingredients) if len(row) == 2],
+                batch_size=kwargs['batch_size'], ignore_conflicts=True)
+        ensure_units()
+        normalize_ingredients()
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:38
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipes',
+            name='image',
+            field=models.ImageField(help_text='Фото блюда', storage=recipes.storage.ContentAddressedStorage(), upload_to='', verbose_name='Фото'),
+        ),
+    ]
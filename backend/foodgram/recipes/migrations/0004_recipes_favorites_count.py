@@ -0,0 +1,30 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_favorites_count(apps, schema_editor):
+    Recipes = apps.get_model('recipes', 'Recipes')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    counts = Favorite.objects.filter(recipe=OuterRef('pk')).values(
+        'recipe').annotate(total=Count('pk')).values('total')
+    Recipes.objects.update(
+        favorites_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipes_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipes',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Сколько раз рецепт добавлен в избранное', verbose_name='В избранном'),
+        ),
+        migrations.RunPython(fill_favorites_count, migrations.RunPython.noop),
+    ]
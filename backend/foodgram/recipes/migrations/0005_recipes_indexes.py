@@ -0,0 +1,40 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:40
+
+from django.db import migrations, models
+
+
+def create_ingredient_prefix_index(apps, schema_editor):
+    # Поиск ?name= строится как UPPER(name::text) LIKE 'X%'. В Postgres
+    # такому запросу нужен функциональный индекс с text_pattern_ops,
+    # в SQLite хватает индекса уникального ограничения.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS ingredient_name_prefix_idx '
+            'ON recipes_ingredient (UPPER(name::text) text_pattern_ops)'
+        )
+
+
+def drop_ingredient_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS ingredient_name_prefix_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipes_favorites_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipes',
+            index=models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipes',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(create_ingredient_prefix_index,
+                             drop_ingredient_prefix_index),
+    ]
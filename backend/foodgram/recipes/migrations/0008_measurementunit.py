@@ -0,0 +1,63 @@
+# Generated by Django 4.2.1 on 2026-10-19 01:08
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import F
+
+UNITS = (
+    ('г', 'г', 1),
+    ('кг', 'г', 1000),
+    ('мл', 'мл', 1),
+    ('л', 'мл', 1000),
+    ('стакан', 'мл', 250),
+    ('ст. л.', 'мл', 15),
+    ('ч. л.', 'мл', 5),
+    ('капля', 'мл', 0.05),
+)
+
+
+def fill_units(apps, schema_editor):
+    MeasurementUnit = apps.get_model('recipes', 'MeasurementUnit')
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    MeasurementUnit.objects.bulk_create(
+        MeasurementUnit(name=name, base_unit=base_unit, factor=factor)
+        for name, base_unit, factor in UNITS)
+    Ingredient.objects.update(base_unit=F('measurement_unit'))
+    for name, base_unit, factor in UNITS:
+        Ingredient.objects.filter(measurement_unit=name).update(
+            base_unit=base_unit, unit_factor=factor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Единица измерения, как она записана у ингредиента', max_length=200, unique=True, verbose_name='Единица измерения')),
+                ('base_unit', models.CharField(help_text='Единица, в которой суммируется список покупок', max_length=200, verbose_name='Базовая единица')),
+                ('factor', models.FloatField(default=1, help_text='Сколько базовых единиц в одной единице', validators=[django.core.validators.MinValueValidator(0)], verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'Единица измерения',
+                'verbose_name_plural': 'Единицы измерения',
+                'ordering': ('base_unit', 'factor'),
+            },
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='base_unit',
+            field=models.CharField(default='', editable=False, help_text='Базовая единица из таблицы единиц измерения', max_length=200, verbose_name='Базовая единица'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='unit_factor',
+            field=models.FloatField(default=1, editable=False, help_text='Сколько базовых единиц в единице измерения', verbose_name='Множитель'),
+        ),
+        migrations.RunPython(fill_units, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.1 on 2026-10-19 01:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_measurementunit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(verbose_name='Время')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Добавлен в избранное'), (2, 'Удалён из избранного'), (3, 'Добавлен в список покупок'), (4, 'Удалён из списка покупок')], verbose_name='Событие')),
+                ('recipe', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='recipes.recipes', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Событие рецепта',
+                'verbose_name_plural': 'События рецептов',
+                'indexes': [models.Index(fields=['created'], name='activity_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ActivityDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='День')),
+                ('favorites_added', models.PositiveIntegerField(default=0, verbose_name='Добавлений в избранное')),
+                ('favorites_removed', models.PositiveIntegerField(default=0, verbose_name='Удалений из избранного')),
+                ('cart_added', models.PositiveIntegerField(default=0, verbose_name='Добавлений в покупки')),
+                ('cart_removed', models.PositiveIntegerField(default=0, verbose_name='Удалений из покупок')),
+                ('recipe', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='recipes.recipes', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Активность за день',
+                'verbose_name_plural': 'Активность по дням',
+                'ordering': ('-date',),
+                'indexes': [models.Index(fields=['date'], name='activity_daily_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='activitydaily',
+            constraint=models.UniqueConstraint(fields=('recipe', 'date'), name='unique_activity_day'),
+        ),
+    ]
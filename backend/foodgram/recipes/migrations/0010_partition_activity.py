@@ -0,0 +1,63 @@
+# Generated by Django 4.2.1 on 2026-10-19 01:40
+
+import datetime
+
+from django.db import migrations
+
+PARTITION_MONTHS_AHEAD = 3
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1,
+                       day=1)
+
+
+def partition_events(apps, schema_editor):
+    """Пересоздание таблицы событий секционированной по месяцам.
+
+    Только для PostgreSQL: первичный ключ секционированной таблицы
+    обязан включать ключ секционирования, поэтому он (id, created).
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    ActivityEvent = apps.get_model('recipes', 'ActivityEvent')
+    table = ActivityEvent._meta.db_table
+    column_type = {
+        name: ActivityEvent._meta.get_field(name).db_type(connection)
+        for name in ('created', 'kind', 'recipe', 'user')
+    }
+    schema_editor.execute(f'DROP TABLE {table}')
+    schema_editor.execute(
+        f'CREATE TABLE {table} ('
+        f'id bigserial, '
+        f'created {column_type["created"]} NOT NULL, '
+        f'kind {column_type["kind"]} NOT NULL, '
+        f'recipe_id {column_type["recipe"]} NOT NULL, '
+        f'user_id {column_type["user"]} NOT NULL, '
+        f'PRIMARY KEY (id, created)'
+        f') PARTITION BY RANGE (created)')
+    schema_editor.execute(
+        f'CREATE INDEX activity_created_idx ON {table} (created)')
+    schema_editor.execute(
+        f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    month = datetime.date.today().replace(day=1)
+    for offset in range(PARTITION_MONTHS_AHEAD):
+        start = add_months(month, offset)
+        schema_editor.execute(
+            f'CREATE TABLE {table}_y{start:%Y}m{start:%m} '
+            f'PARTITION OF {table} FOR VALUES '
+            f"FROM ('{start.isoformat()}') "
+            f"TO ('{add_months(start, 1).isoformat()}')")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_events, migrations.RunPython.noop),
+    ]
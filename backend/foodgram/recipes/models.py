@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
+from recipes.storage import ContentAddressedStorage
 from recipes.validators import ColorValidator
 from users.validators import NameValidator
 
@@ -40,6 +41,35 @@ class Tag(models.Model):
         return self.name
 
 
+class MeasurementUnit(models.Model):
+    """Единица измерения и её перевод в базовую."""
+    name = models.CharField(
+        unique=True,
+        max_length=settings.LENGTH_FIELDS_RECIPES,
+        verbose_name='Единица измерения',
+        help_text='Единица измерения, как она записана у ингредиента',
+    )
+    base_unit = models.CharField(
+        max_length=settings.LENGTH_FIELDS_RECIPES,
+        verbose_name='Базовая единица',
+        help_text='Единица, в которой суммируется список покупок',
+    )
+    factor = models.FloatField(
+        validators=[MinValueValidator(0)],
+        default=1,
+        verbose_name='Множитель',
+        help_text='Сколько базовых единиц в одной единице',
+    )
+
+    class Meta:
+        ordering = ('base_unit', 'factor')
+        verbose_name = 'Единица измерения'
+        verbose_name_plural = 'Единицы измерения'
+
+    def __str__(self):
+        return f'{self.name} = {self.factor:g} {self.base_unit}'
+
+
 class Ingredient(models.Model):
     """Модель ингридиентов."""
     name = models.CharField(
@@ -54,6 +84,19 @@ class Ingredient(models.Model):
         verbose_name='Единицы измерения',
         help_text='Единицы измерения'
     )
+    base_unit = models.CharField(
+        default='',
+        max_length=settings.LENGTH_FIELDS_RECIPES,
+        editable=False,
+        verbose_name='Базовая единица',
+        help_text='Базовая единица из таблицы единиц измерения',
+    )
+    unit_factor = models.FloatField(
+        default=1,
+        editable=False,
+        verbose_name='Множитель',
+        help_text='Сколько базовых единиц в единице измерения',
+    )
 
     class Meta:
         ordering = ('name',)
@@ -67,6 +110,15 @@ class Ingredient(models.Model):
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
 
+    def save(self, *args, **kwargs):
+        unit = MeasurementUnit.objects.filter(
+            name=self.measurement_unit).first()
+        if unit is None:
+            self.base_unit, self.unit_factor = self.measurement_unit, 1
+        else:
+            self.base_unit, self.unit_factor = unit.base_unit, unit.factor
+        super().save(*args, **kwargs)
+
 
 class Recipes(models.Model):
     """Модель рецепта."""
@@ -86,6 +138,7 @@ class Recipes(models.Model):
     image = models.ImageField(
         verbose_name='Фото',
         help_text='Фото блюда',
+        storage=ContentAddressedStorage(),
     )
     text = models.TextField(
         verbose_name='Описание',
@@ -114,11 +167,22 @@ class Recipes(models.Model):
         verbose_name='Дата создания рецепта',
         help_text='Введите дату создания рецепта',
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном',
+        help_text='Сколько раз рецепт добавлен в избранное',
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=('-pub_date',), name='recipe_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='recipe_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -225,3 +289,190 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.user} {self.recipe}'
+
+
+class FeedEntry(models.Model):
+    """Рецепт в ленте подписчика, копируется при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Читатель',
+        help_text='Владелец ленты',
+    )
+    recipe = models.ForeignKey(
+        Recipes,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рецепт',
+        help_text='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта',
+        help_text='Автор рецепта',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+        help_text='Дата публикации рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry',
+            ),
+        )
+        indexes = [
+            models.Index(fields=('user', '-pub_date', '-recipe'),
+                         name='feed_user_pub_date_idx'),
+            models.Index(fields=('user', 'author'),
+                         name='feed_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.recipe}'
+
+
+class SimilarRecipe(models.Model):
+    """Похожий рецепт, рассчитывается командой build_similarity."""
+    recipe = models.ForeignKey(
+        Recipes,
+        on_delete=models.CASCADE,
+        related_name='similar',
+        verbose_name='Рецепт',
+        help_text='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipes,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт',
+        help_text='Похожий рецепт',
+    )
+    score = models.FloatField(
+        verbose_name='Сходство',
+        help_text='Косинусное сходство по ингредиентам и тегам',
+    )
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name='unique_similar_recipe',
+            ),
+        )
+        indexes = [
+            models.Index(fields=('recipe', '-score'),
+                         name='similar_recipe_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.similar}'
+
+
+class ActivityEvent(models.Model):
+    """Событие избранного или списка покупок, таблица только дополняется.
+
+    В PostgreSQL таблица секционирована по месяцам (поле created),
+    старые секции удаляет compact_activity после свёртки в ActivityDaily.
+    Ссылки без внешних ключей: история переживает удаление рецепта.
+    """
+    FAVORITE_ADDED = 1
+    FAVORITE_REMOVED = 2
+    CART_ADDED = 3
+    CART_REMOVED = 4
+    KINDS = (
+        (FAVORITE_ADDED, 'Добавлен в избранное'),
+        (FAVORITE_REMOVED, 'Удалён из избранного'),
+        (CART_ADDED, 'Добавлен в список покупок'),
+        (CART_REMOVED, 'Удалён из списка покупок'),
+    )
+
+    created = models.DateTimeField(
+        verbose_name='Время',
+    )
+    kind = models.PositiveSmallIntegerField(
+        choices=KINDS,
+        verbose_name='Событие',
+    )
+    recipe = models.ForeignKey(
+        Recipes,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+        verbose_name='Пользователь',
+    )
+
+    class Meta:
+        verbose_name = 'Событие рецепта'
+        verbose_name_plural = 'События рецептов'
+        indexes = [
+            models.Index(fields=('created',), name='activity_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.recipe_id}'
+
+
+class ActivityDaily(models.Model):
+    """События рецепта за день, собираются командой compact_activity."""
+    recipe = models.ForeignKey(
+        Recipes,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+    date = models.DateField(
+        verbose_name='День',
+    )
+    favorites_added = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Добавлений в избранное',
+    )
+    favorites_removed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалений из избранного',
+    )
+    cart_added = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Добавлений в покупки',
+    )
+    cart_removed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалений из покупок',
+    )
+
+    class Meta:
+        ordering = ('-date',)
+        verbose_name = 'Активность за день'
+        verbose_name_plural = 'Активность по дням'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'date'),
+                name='unique_activity_day',
+            ),
+        )
+        indexes = [
+            models.Index(fields=('date',), name='activity_daily_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} {self.date}'
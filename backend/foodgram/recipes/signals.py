@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Favorite, Recipes
+from recipes.tasks import delete_unused_image, fan_out_recipe
+
+
+@receiver(post_save, sender=Favorite)
+def increase_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        Recipes.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F('favorites_count') + 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrease_favorites_count(sender, instance, **kwargs):
+    Recipes.objects.filter(pk=instance.recipe_id).update(
+        favorites_count=F('favorites_count') - 1)
+
+
+@receiver(post_delete, sender=Recipes)
+def delete_recipe_image(sender, instance, **kwargs):
+    if instance.image:
+        delete_unused_image.enqueue(
+            countdown=settings.IMAGE_DELETE_DELAY, name=instance.image.name)
+
+
+@receiver(post_save, sender=Recipes)
+def fan_out_new_recipe(sender, instance, created, **kwargs):
+    if created:
+        fan_out_recipe.enqueue(recipe_id=instance.pk)
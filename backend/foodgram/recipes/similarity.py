@@ -0,0 +1,98 @@
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+from recipes.models import RecipeIngredient, Recipes
+
+# float32 сходства, его транспонированная копия и int64 индексы
+# argpartition.
+BYTES_PER_CELL = 16
+
+
+def load_pairs(queryset, fields, chunk_size):
+    """Пары id из базы в массивы numpy без списка кортежей в памяти."""
+    left, right = array('q'), array('q')
+    for first, second in queryset.values_list(*fields).iterator(
+            chunk_size=chunk_size):
+        left.append(first)
+        right.append(second)
+    return (np.asarray(left, dtype=np.int64),
+            np.asarray(right, dtype=np.int64))
+
+
+def feature_block(recipe_ids, rows, features, weight, idf):
+    """Разреженный блок признаков с нормой строки sqrt(weight)."""
+    position = np.searchsorted(recipe_ids, rows)
+    known = position < len(recipe_ids)
+    known[known] = recipe_ids[position[known]] == rows[known]
+    position, features = position[known], features[known]
+    columns, index = np.unique(features, return_inverse=True)
+    values = np.ones(len(index), dtype=np.float32)
+    if idf:
+        frequency = np.bincount(index, minlength=len(columns))
+        values = np.log((1 + len(recipe_ids)) / (1 + frequency))[
+            index].astype(np.float32) + 1
+    block = sparse.csr_matrix(
+        (values, (position, index)),
+        shape=(len(recipe_ids), len(columns)), dtype=np.float32)
+    norms = np.sqrt(np.asarray(block.multiply(block).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(np.sqrt(weight) / norms) @ block
+
+
+def build_matrix(tag_weight, chunk_size=10000):
+    """Матрица рецепт × (ингредиенты, теги) с L2-нормой строк 1.
+
+    Ингредиенты взвешены по IDF, чтобы соль и вода не делали похожими
+    все рецепты. Скалярное произведение строк равно
+    (1 - tag_weight) * сходство по ингредиентам
+    + tag_weight * сходство по тегам.
+    """
+    recipe_ids = np.fromiter(
+        Recipes.objects.order_by('id').values_list('id', flat=True)
+        .iterator(chunk_size=chunk_size), dtype=np.int64)
+    ingredients = feature_block(
+        recipe_ids,
+        *load_pairs(RecipeIngredient.objects.all(),
+                    ('recipe_id', 'ingredient_id'), chunk_size),
+        weight=1 - tag_weight, idf=True)
+    tags = feature_block(
+        recipe_ids,
+        *load_pairs(Recipes.tags.through.objects.all(),
+                    ('recipes_id', 'tag_id'), chunk_size),
+        weight=tag_weight, idf=False)
+    return recipe_ids, sparse.hstack((ingredients, tags), format='csr')
+
+
+def chunk_size_for(rows, memory_mb):
+    return max(1, memory_mb * 1024 * 1024 // (BYTES_PER_CELL * max(rows, 1)))
+
+
+def similarity_block(matrix, targets):
+    """Сходство целевых рецептов со всеми: плотный массив targets × N.
+
+    Целевых строк немного, поэтому они разворачиваются в плотный блок,
+    и умножение разреженной матрицы на плотную не создаёт огромного
+    разреженного результата из-за популярных ингредиентов и тегов.
+    Строки результата непрерывны в памяти для быстрого argpartition.
+    """
+    block = np.ascontiguousarray(
+        (matrix @ matrix[targets].toarray().T).T, dtype=np.float32)
+    block[np.arange(len(targets)), targets] = -1
+    return block
+
+
+def top_k(block, k, min_score):
+    """Лучшие k по каждой строке: список (столбцы, оценки)."""
+    k = min(k, block.shape[1] - 1)
+    if k <= 0:
+        return [(np.empty(0, dtype=np.int64), np.empty(0))] * block.shape[0]
+    best = np.argpartition(block, -k, axis=1)[:, -k:]
+    scores = np.take_along_axis(block, best, axis=1)
+    order = np.argsort(-scores, axis=1)
+    best = np.take_along_axis(best, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    keep = scores >= min_score
+    return [(best[row][keep[row]], scores[row][keep[row]])
+            for row in range(block.shape[0])]
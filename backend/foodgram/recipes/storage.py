@@ -0,0 +1,39 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по SHA-256 содержимого.
+
+    Одинаковые загрузки сохраняются один раз, файлы раскладываются
+    по каталогам prefix/ab/cd/<хэш>.<расширение>. Время изменения
+    существующего файла обновляется при повторной загрузке, чтобы
+    отложенное удаление не убрало его из-под нового рецепта.
+    """
+    prefix = 'recipes'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        content_hash = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return '/'.join((self.prefix, content_hash[:2], content_hash[2:4],
+                         content_hash + extension))
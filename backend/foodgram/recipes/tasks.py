@@ -0,0 +1,35 @@
+import os
+import time
+
+from django.conf import settings
+
+from outbox.tasks import task
+from recipes import feed
+from recipes.models import Recipes
+
+
+@task
+def delete_unused_image(name):
+    """Удаление изображения, на которое больше не ссылаются рецепты.
+
+    Файл, к которому недавно обращалась параллельная загрузка того же
+    изображения, пропускается: его позже уберёт gc_media.
+    """
+    storage = Recipes._meta.get_field('image').storage
+    if not name or not storage.exists(name):
+        return
+    if Recipes.objects.filter(image=name).exists():
+        return
+    if (time.time() - os.path.getmtime(storage.path(name))
+            < settings.IMAGE_DELETE_DELAY):
+        return
+    storage.delete(name)
+
+
+@task
+def fan_out_recipe(recipe_id):
+    """Рассылка нового рецепта в ленты подписчиков."""
+    recipe = Recipes.objects.select_related('author').filter(
+        pk=recipe_id).first()
+    if recipe is not None:
+        feed.fan_out(recipe)
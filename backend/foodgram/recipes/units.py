@@ -0,0 +1,45 @@
+from django.db.models import F
+
+from recipes.models import Ingredient, MeasurementUnit
+
+# Штуки, пучки, «по вкусу» и т. п. в таблицу не входят: для них
+# базовой единицей остаётся сама единица ингредиента.
+DEFAULT_UNITS = (
+    ('г', 'г', 1),
+    ('кг', 'г', 1000),
+    ('мл', 'мл', 1),
+    ('л', 'мл', 1000),
+    ('стакан', 'мл', 250),
+    ('ст. л.', 'мл', 15),
+    ('ч. л.', 'мл', 5),
+    ('капля', 'мл', 0.05),
+)
+
+
+def ensure_units():
+    MeasurementUnit.objects.bulk_create(
+        [MeasurementUnit(name=name, base_unit=base_unit, factor=factor)
+         for name, base_unit, factor in DEFAULT_UNITS],
+        ignore_conflicts=True)
+
+
+def normalize_ingredients(queryset=None):
+    """Базовая единица и множитель ингредиентов, UPDATE на каждую единицу."""
+    if queryset is None:
+        queryset = Ingredient.objects.all()
+    units = list(MeasurementUnit.objects.values_list(
+        'name', 'base_unit', 'factor'))
+    updated = queryset.exclude(
+        measurement_unit__in=[name for name, _, _ in units]).update(
+        base_unit=F('measurement_unit'), unit_factor=1)
+    for name, base_unit, factor in units:
+        updated += queryset.filter(measurement_unit=name).update(
+            base_unit=base_unit, unit_factor=factor)
+    return updated
+
+
+def format_amount(value):
+    value = round(value, 2)
+    if value == int(value):
+        return str(int(value))
+    return f'{value:.2f}'.rstrip('0')
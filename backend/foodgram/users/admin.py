@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from foodgram.paginators import EstimatedCountPaginator
+
 from .models import User
 
 
@@ -12,9 +14,12 @@ class UserAdmin(admin.ModelAdmin):
         'email'
     )
     list_filter = (
-        'username',
-        'email'
+        'is_active',
+        'is_staff',
     )
+    search_fields = ('^username', '^email')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-19 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_fanout',
+            field=models.BooleanField(default=True, editable=False, help_text='Новые рецепты копируются в ленты подписчиков. Для популярных авторов лента собирается при чтении.', verbose_name='Рассылка в ленты'),
+        ),
+    ]
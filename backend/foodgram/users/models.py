@@ -37,6 +37,13 @@ class User(AbstractUser):
         help_text='Фамилия',
         validators=[NameValidator()]
     )
+    feed_fanout = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Рассылка в ленты',
+        help_text='Новые рецепты копируются в ленты подписчиков. '
+                  'Для популярных авторов лента собирается при чтении.'
+    )
 
     class Meta:
         ordering = ('username',)
@@ -0,0 +1,53 @@
+"""Сравнение двух прогонов Locust: python compare.py <отчёт-до> <отчёт-после>."""
+import csv
+import os
+import sys
+
+COLUMNS = (
+    ('Requests/s', 'RPS'),
+    ('Failure Count', 'ошибки'),
+    ('50%', 'p50'),
+    ('95%', 'p95'),
+    ('99%', 'p99'),
+)
+
+
+def load(report_dir):
+    with open(os.path.join(report_dir, 'stats_stats.csv'),
+              encoding='utf-8') as stats:
+        return {row['Name']: row for row in csv.DictReader(stats)}
+
+
+def value(row, column):
+    """Число из отчёта; None, если Locust не посчитал перцентиль (N/A)."""
+    try:
+        return float(row[column])
+    except ValueError:
+        return None
+
+
+def cell(old, new):
+    if old is None or new is None:
+        return ' -> '.join('N/A' if number is None else f'{number:g}'
+                           for number in (old, new))
+    change = f' ({(new - old) / old:+.0%})' if old else ''
+    return f'{old:g} -> {new:g}{change}'
+
+
+def main(before_dir, after_dir):
+    before, after = load(before_dir), load(after_dir)
+    header = ['Эндпоинт'] + [title for _, title in COLUMNS]
+    print(' | '.join(header))
+    for name in sorted(set(before) & set(after), key=lambda n: (
+            n == 'Aggregated', n)):
+        cells = [name]
+        for column, _ in COLUMNS:
+            cells.append(cell(value(before[name], column),
+                              value(after[name], column)))
+        print(' | '.join(cells))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(__doc__)
+    main(sys.argv[1], sys.argv[2])
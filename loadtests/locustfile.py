@@ -0,0 +1,155 @@
+"""Сценарии нагрузочного теста Foodgram для Locust.
+
+Повторяют запросы SPA: анонимный просмотр ленты с фильтром по тегам,
+вход через djoser, избранное, корзина, скачивание списка покупок,
+подписки и создание рецептов с base64-картинкой.
+
+Пользователи берутся из generate_data: user<id>@example.com / password.
+"""
+import os
+import random
+
+from locust import HttpUser, between, task
+
+FIRST_USER_ID = int(os.getenv('LOADTEST_FIRST_USER_ID', 1))
+USERS_COUNT = int(os.getenv('LOADTEST_USERS', 1000))
+PASSWORD = os.getenv('LOADTEST_PASSWORD', 'password')
+TAGS = os.getenv('LOADTEST_TAGS', 'breakfast,lunch,dinner').split(',')
+SEARCH_PREFIXES = ('са', 'мо', 'ку', 'то', 'ка', 'я')
+PNG_1PX = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAAAl21bKAAAA'
+    'A1BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYAAAAAIAAeIhvDMAAAAAS'
+    'UVORK5CYII='
+)
+
+
+class FoodgramUser(HttpUser):
+    abstract = True
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        self.recipe_ids = []
+        self.author_ids = []
+
+    def remember(self, response):
+        if not response.ok:
+            return
+        data = response.json()
+        for recipe in data.get('results', [data]):
+            if 'id' in recipe:
+                self.recipe_ids.append(recipe['id'])
+            if isinstance(recipe.get('author'), dict):
+                self.author_ids.append(recipe['author']['id'])
+        del self.recipe_ids[:-100]
+        del self.author_ids[:-100]
+
+    @task(10)
+    def recipes_page(self):
+        page = random.randint(1, 20)
+        self.remember(self.client.get(
+            f'/api/recipes/?page={page}&limit=6', name='/api/recipes/'))
+
+    @task(5)
+    def recipes_by_tags(self):
+        tags = random.sample(TAGS, random.randint(1, len(TAGS)))
+        query = '&'.join(f'tags={tag}' for tag in tags)
+        self.remember(self.client.get(
+            f'/api/recipes/?page=1&limit=6&{query}',
+            name='/api/recipes/?tags='))
+
+    @task(4)
+    def recipe_detail(self):
+        if self.recipe_ids:
+            self.client.get(
+                f'/api/recipes/{random.choice(self.recipe_ids)}/',
+                name='/api/recipes/[id]/')
+
+    @task(2)
+    def tags(self):
+        self.client.get('/api/tags/')
+
+    @task(1)
+    def ingredient_search(self):
+        self.client.get(
+            f'/api/ingredients/?name={random.choice(SEARCH_PREFIXES)}',
+            name='/api/ingredients/?name=')
+
+
+class AnonymousVisitor(FoodgramUser):
+    weight = 3
+
+
+class SignedInUser(FoodgramUser):
+    weight = 1
+
+    def on_start(self):
+        super().on_start()
+        user_id = random.randint(FIRST_USER_ID,
+                                 FIRST_USER_ID + USERS_COUNT - 1)
+        response = self.client.post('/api/auth/token/login/', json={
+            'email': f'user{user_id}@example.com', 'password': PASSWORD,
+        }, name='/api/auth/token/login/')
+        token = response.json().get('auth_token') if response.ok else None
+        if token:
+            self.client.headers['Authorization'] = f'Token {token}'
+        self.recipes_page()
+
+    @task(3)
+    def toggle_favorite(self):
+        self.toggle('favorite')
+
+    @task(3)
+    def toggle_cart(self):
+        self.toggle('shopping_cart')
+
+    def toggle(self, action):
+        if not self.recipe_ids:
+            return
+        url = f'/api/recipes/{random.choice(self.recipe_ids)}/{action}/'
+        name = f'/api/recipes/[id]/{action}/'
+        with self.client.post(url, name=name,
+                              catch_response=True) as response:
+            if response.status_code == 400:
+                response.success()
+                self.client.delete(url, name=name)
+
+    @task(1)
+    def download_shopping_cart(self):
+        self.client.get('/api/recipes/download_shopping_cart/')
+
+    @task(2)
+    def subscriptions(self):
+        self.client.get('/api/users/subscriptions/?limit=6&recipes_limit=3',
+                        name='/api/users/subscriptions/')
+
+    @task(1)
+    def toggle_follow(self):
+        if not self.author_ids:
+            return
+        url = f'/api/users/{random.choice(self.author_ids)}/subscribe/'
+        name = '/api/users/[id]/subscribe/'
+        with self.client.post(url, name=name,
+                              catch_response=True) as response:
+            if response.status_code == 400:
+                response.success()
+                self.client.delete(url, name=name)
+
+    @task(1)
+    def create_recipe(self):
+        tags = self.client.get('/api/tags/').json()
+        ingredients = self.client.get(
+            f'/api/ingredients/?name={random.choice(SEARCH_PREFIXES)}',
+            name='/api/ingredients/?name=').json()
+        if not tags or not ingredients:
+            return
+        chosen = random.sample(ingredients, min(len(ingredients), 5))
+        self.remember(self.client.post('/api/recipes/', json={
+            'name': 'Нагрузочный рецепт',
+            'text': 'Рецепт создан нагрузочным тестом.',
+            'cooking_time': random.randint(5, 120),
+            'image': PNG_1PX,
+            'tags': [random.choice(tags)['id']],
+            'ingredients': [{'id': item['id'],
+                             'amount': random.randint(1, 500)}
+                            for item in chosen],
+        }))
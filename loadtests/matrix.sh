@@ -0,0 +1,51 @@
+#!/bin/sh
+# Запуск: loadtests/matrix.sh [пользователи] [длительность] [конфигурации]
+# Конфигурация — класс:воркеры:потоки, по умолчанию
+# "sync:4:1 gthread:2:4 gthread:4:4". Для каждой gunicorn запускается
+# локально из backend/foodgram с настройками из окружения (.env базы),
+# без ограничений частоты. Отчёты — loadtests/reports/<дата>-matrix/,
+# сводная таблица — python loadtests/matrix_report.py <каталог>.
+set -e
+DIR=$(cd "$(dirname "$0")" && pwd)
+USERS=${1:-50}
+DURATION=${2:-1m}
+CONFIGS=${3:-"sync:4:1 gthread:2:4 gthread:4:4"}
+PORT=${MATRIX_PORT:-8765}
+OUT="$DIR/reports/$(date +%Y%m%d-%H%M%S)-matrix"
+PIDFILE="$OUT/gunicorn.pid"
+mkdir -p "$OUT"
+
+stop() {
+    if [ -f "$PIDFILE" ]; then
+        kill "$(cat "$PIDFILE")" 2>/dev/null || true
+        while [ -f "$PIDFILE" ]; do sleep 0.2; done
+    fi
+}
+trap stop EXIT
+
+for CONFIG in $CONFIGS; do
+    IFS=: read -r CLASS WORKERS THREADS <<EOF
+$CONFIG
+EOF
+    (
+        cd "$DIR/../backend/foodgram"
+        GUNICORN_BIND=127.0.0.1:$PORT GUNICORN_WORKER_CLASS=$CLASS \
+        GUNICORN_WORKERS=$WORKERS GUNICORN_THREADS=$THREADS \
+        THROTTLE_ANON_READ= THROTTLE_USER_READ= THROTTLE_USER_WRITE= \
+        THROTTLE_EXPORT= THROTTLE_AUTH= \
+        gunicorn foodgram.wsgi:application --pid "$PIDFILE" --daemon \
+            --error-logfile "$OUT/gunicorn-$CONFIG.log"
+    )
+    until curl -sf -o /dev/null "http://127.0.0.1:$PORT/api/tags/"; do
+        sleep 0.5
+    done
+    mkdir -p "$OUT/$CONFIG"
+    # locust завершается с кодом 1 при любой ошибке запроса, а ошибки
+    # видны в сводке; матрица продолжается.
+    locust -f "$DIR/locustfile.py" --host "http://127.0.0.1:$PORT" \
+        --headless --users "$USERS" --spawn-rate 10 \
+        --run-time "$DURATION" --csv "$OUT/$CONFIG/stats" --only-summary \
+        || true
+    stop
+done
+python "$DIR/matrix_report.py" "$OUT"
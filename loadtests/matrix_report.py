@@ -0,0 +1,40 @@
+"""Сводка прогонов matrix.sh: python matrix_report.py <каталог-матрицы>."""
+import csv
+import os
+import sys
+
+COLUMNS = (
+    ('Request Count', 'запросов'),
+    ('Requests/s', 'RPS'),
+    ('Failure Count', 'ошибки'),
+    ('50%', 'p50'),
+    ('95%', 'p95'),
+    ('99%', 'p99'),
+)
+
+
+def aggregated(stats_path):
+    with open(stats_path, encoding='utf-8') as stats:
+        for row in csv.DictReader(stats):
+            if row['Name'] == 'Aggregated':
+                return row
+    return None
+
+
+def main(matrix_dir):
+    print(' | '.join(['Конфигурация'] + [title for _, title in COLUMNS]))
+    for config in sorted(os.listdir(matrix_dir)):
+        stats_path = os.path.join(matrix_dir, config, 'stats_stats.csv')
+        if not os.path.exists(stats_path):
+            continue
+        row = aggregated(stats_path)
+        if row is None:
+            continue
+        print(' | '.join(
+            [config] + [f'{float(row[column]):g}' for column, _ in COLUMNS]))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    main(sys.argv[1])
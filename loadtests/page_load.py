@@ -0,0 +1,137 @@
+"""Запросы и байты при загрузке страниц: первый и повторный визит.
+
+Запуск: python page_load.py <адрес> [страница ...]
+
+Скрипт загружает страницу, её стили, скрипты, картинки и файлы из
+url() в CSS так, как это делает браузер: при повторном визите свежие
+по Cache-Control ресурсы берутся из кэша без запроса, остальные
+перепроверяются условным запросом (ответ 304). Учитываются байты тел
+ответов в том виде, в котором они пришли по сети (со сжатием).
+"""
+import gzip
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAGES = ('/', '/admin/login/', '/api/recipes/?format=api')
+ACCEPT_ENCODING = 'br, gzip' if brotli else 'gzip'
+CSS_URL = re.compile(r'''url\(\s*['"]?([^'")]+)['"]?\s*\)'''
+                     r'''|@import\s+['"]([^'"]+)['"]''')
+
+
+class AssetParser(HTMLParser):
+    """Адреса ресурсов, которые браузер загружает вместе со страницей."""
+
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'link' and attrs.get('rel') in (
+                'stylesheet', 'icon', 'shortcut icon', 'manifest'):
+            self.assets.append(attrs.get('href'))
+        elif tag in ('script', 'img'):
+            self.assets.append(attrs.get('src'))
+
+
+def decode(body, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return body
+
+
+def max_age(headers):
+    """Время свежести ответа в секундах по Cache-Control."""
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-cache' in cache_control or 'no-store' in cache_control:
+        return 0
+    found = re.search(r'max-age=(\d+)', cache_control)
+    return int(found.group(1)) if found else 0
+
+
+class Browser:
+    def __init__(self):
+        self.cache = {}
+        self.requests = self.transferred = 0
+
+    def get(self, url):
+        """Тело ответа (из кэша или сети) и его Content-Type."""
+        cached = self.cache.get(url)
+        if cached and cached['expires'] > time.time():
+            return cached['content'], cached['type']
+        request = urllib.request.Request(
+            url, headers={'Accept-Encoding': ACCEPT_ENCODING})
+        if cached and cached['etag']:
+            request.add_header('If-None-Match', cached['etag'])
+        if cached and cached['modified']:
+            request.add_header('If-Modified-Since', cached['modified'])
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(request) as response:
+                body = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as error:
+            if error.code != 304 or cached is None:
+                raise
+            cached['expires'] = time.time() + max_age(error.headers)
+            return cached['content'], cached['type']
+        self.transferred += len(body)
+        content = decode(body, headers.get('Content-Encoding'))
+        self.cache[url] = {
+            'content': content,
+            'type': headers.get_content_type(),
+            'etag': headers.get('ETag'),
+            'modified': headers.get('Last-Modified'),
+            'expires': time.time() + max_age(headers),
+        }
+        return content, headers.get_content_type()
+
+    def load(self, url):
+        content, _ = self.get(url)
+        parser = AssetParser()
+        parser.feed(content.decode('utf-8', 'replace'))
+        pending = [urljoin(url, asset) for asset in parser.assets if asset]
+        seen = set()
+        while pending:
+            asset = pending.pop()
+            if asset in seen or asset.startswith('data:'):
+                continue
+            seen.add(asset)
+            try:
+                content, content_type = self.get(asset)
+            except urllib.error.HTTPError as error:
+                print(f'  {error.code} {asset}')
+                continue
+            if content_type == 'text/css':
+                for groups in CSS_URL.findall(
+                        content.decode('utf-8', 'replace')):
+                    pending.append(urljoin(asset, groups[0] or groups[1]))
+
+
+def main(host, pages):
+    browser = Browser()
+    print('Визит | запросов | КБ')
+    for visit in ('первый', 'повторный'):
+        browser.requests = browser.transferred = 0
+        for page in pages:
+            browser.load(urljoin(host, page))
+        print(f'{visit} | {browser.requests} | '
+              f'{browser.transferred / 1024:.1f}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1], sys.argv[2:] or PAGES)
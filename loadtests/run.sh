@@ -0,0 +1,15 @@
+#!/bin/sh
+# Запуск: loadtests/run.sh [адрес] [пользователи] [длительность]
+# Отчёты пишутся в loadtests/reports/<дата>-<коммит>/.
+set -e
+DIR=$(dirname "$0")
+HOST=${1:-http://localhost:8000}
+USERS=${2:-50}
+DURATION=${3:-2m}
+COMMIT=$(git rev-parse --short HEAD 2>/dev/null || echo nogit)
+OUT="$DIR/reports/$(date +%Y%m%d-%H%M%S)-$COMMIT"
+mkdir -p "$OUT"
+locust -f "$DIR/locustfile.py" --host "$HOST" --headless \
+    --users "$USERS" --spawn-rate 10 --run-time "$DURATION" \
+    --csv "$OUT/stats" --html "$OUT/report.html" --only-summary
+echo "Отчёт: $OUT"